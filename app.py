@@ -2,21 +2,22 @@
 '''
 Main entry point for Streamlit
 '''
+import importlib
 import streamlit as st
-from page_handler import home, cat_report, comp_report
 
 # Set basic config
 st.set_page_config(page_title="Entry Portal", layout="wide")
 
-# Page routing logic
+# Page routing logic (modules are imported on first visit, so the Home page
+# never pays for pandas / PDF parsing imports)
 PAGES = {
-    "Home": home,
-    "Catalog Report": cat_report,
-    "Comparison Report": comp_report
+    "Home": "page_handler.home",
+    "Catalog Report": "page_handler.cat_report",
+    "Comparison Report": "page_handler.comp_report"
 }
 # Sidebar Navigation
 st.sidebar.title("Navigation")
 selection = st.sidebar.radio("Go to", list(PAGES.keys()))
 
 # Render the pages
-PAGES[selection].show()
\ No newline at end of file
+importlib.import_module(PAGES[selection]).show()
@@ -0,0 +1,3 @@
+# catalog_parser/__init__.py
+# Bump whenever a parser change can alter output; checkpoints and cached results are keyed on it.
+PARSER_VERSION = "3"
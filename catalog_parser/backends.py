@@ -0,0 +1,411 @@
+# catalog_parser/backends.py
+'''
+Pluggable PDF text-extraction backends.
+
+Every backend turns one physical page into plain text. `CascadeExtractor` asks
+the fastest available backend first and only escalates a page to the next
+(slower) backend when the text it got back is empty or implausible.
+
+    python -m catalog_parser.backends calibrate catalog.pdf --sample 25
+
+benchmarks every installed backend on a sample of pages and stores the
+fastest-first ranking the cascade uses from then on.
+'''
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import re
+import time
+from pathlib import Path
+
+from .source import PdfSource, as_source
+from .pageindex import PageIndex
+from .textstore import PageView, TextStore
+
+# Relative, so they are resolved against the working directory each time they are used
+CALIBRATION_FILE = Path("upl_file_bunker") / "backend_calibration.json"
+PLAUSIBLE_TOLERANCE = 5.0  # percentage points
+# Set OVS_TEXT_CACHE=1 to keep each catalog's extracted text on disk between runs
+TEXT_CACHE_DIR = Path("upl_file_bunker") / "text_cache"
+TEXT_CACHE = os.environ.get("OVS_TEXT_CACHE") == "1"
+
+# ---------- backends ----------
+
+class ExtractionBackend:
+    """
+    Base class: `open(source)` returns a handle, `page_text(handle, i)` returns a page's text.
+    """
+    name = "base"
+    module = None       # import name that must be installed for the backend to be usable
+    # Order used until a calibration has been run. PyPDF2 leads because the parser
+    # rules were tuned on its output; calibration promotes faster backends.
+    default_rank = 100
+
+    @classmethod
+    def available(cls) -> bool:
+        return cls.module is None or importlib.util.find_spec(cls.module) is not None
+
+    def open(self, source: PdfSource):
+        raise NotImplementedError
+
+    def page_count(self, handle) -> int:
+        raise NotImplementedError
+
+    def page_text(self, handle, index: int) -> str:
+        raise NotImplementedError
+
+    def close(self, handle) -> None:
+        pass
+
+
+class PyPDF2Backend(ExtractionBackend):
+    name = "pypdf2"
+    module = "PyPDF2"
+    default_rank = 10
+
+    def open(self, source):
+        return source.reader()
+
+    def page_count(self, handle):
+        return len(handle.pages)
+
+    def page_text(self, handle, index):
+        return handle.pages[index].extract_text() or ""
+
+
+class PdfPlumberBackend(ExtractionBackend):
+    name = "pdfplumber"
+    module = "pdfplumber"
+    default_rank = 40
+
+    def open(self, source):
+        return source.plumber()
+
+    def page_count(self, handle):
+        return len(handle.pages)
+
+    def page_text(self, handle, index):
+        page = handle.pages[index]
+        text = page.extract_text() or ""
+        page.close()  # drop the cached layout objects for this page
+        return text
+
+    def close(self, handle):
+        handle.close()
+
+
+class PyMuPDFBackend(ExtractionBackend):
+    """Optional: `pip install pymupdf`."""
+    name = "pymupdf"
+    module = "fitz"
+    default_rank = 20
+
+    def open(self, source):
+        import fitz
+        return fitz.open(stream=bytes(source.data), filetype="pdf")
+
+    def page_count(self, handle):
+        return handle.page_count
+
+    def page_text(self, handle, index):
+        return handle[index].get_text() or ""
+
+    def close(self, handle):
+        handle.close()
+
+
+class PdfiumBackend(ExtractionBackend):
+    """Optional: `pip install pypdfium2`."""
+    name = "pdfium"
+    module = "pypdfium2"
+    default_rank = 20
+
+    def open(self, source):
+        import pypdfium2 as pdfium
+        return pdfium.PdfDocument(bytes(source.data))
+
+    def page_count(self, handle):
+        return len(handle)
+
+    def page_text(self, handle, index):
+        page = handle[index]
+        textpage = page.get_textpage()
+        text = textpage.get_text_range() or ""
+        textpage.close()
+        page.close()
+        return text.replace("\r\n", "\n")
+
+    def close(self, handle):
+        handle.close()
+
+
+BACKENDS = {cls.name: cls for cls in (PyMuPDFBackend, PdfiumBackend, PyPDF2Backend, PdfPlumberBackend)}
+
+# ---------- confidence check ----------
+
+MIN_CHARS = 10
+CID_MARKER = re.compile(r"\(cid:\d+\)")
+
+def is_plausible(text: str) -> bool:
+    """
+    Cheap sanity check on extracted text: enough characters, mostly letters /
+    digits / punctuation, and no sign of an undecoded font (cid markers, U+FFFD).
+    """
+    stripped = text.strip()
+    if len(stripped) < MIN_CHARS:
+        return False
+    if CID_MARKER.search(stripped) or stripped.count("�") > len(stripped) * 0.01:
+        return False
+    printable = sum(ch.isprintable() or ch in "\n\t" for ch in stripped)
+    if printable < len(stripped) * 0.95:
+        return False
+    words = stripped.split()
+    # Glyph-per-line or glued-together output shows up as absurd word lengths
+    avg_word = sum(map(len, words)) / len(words)
+    return 2 <= avg_word <= 25
+
+# ---------- ranking ----------
+
+def load_ranking(path: Path | None = None) -> list[str] | None:
+    path = Path.cwd() / CALIBRATION_FILE if path is None else path
+    try:
+        return json.loads(path.read_text())["ranking"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def available_backends(order: list[str] | None = None) -> list[ExtractionBackend]:
+    """
+    Installed backends, fastest first: explicit `order`, else the calibrated
+    ranking, else each backend's static rank.
+    """
+    order = order or load_ranking()
+    installed = [cls for cls in BACKENDS.values() if cls.available()]
+    if order:
+        ranked = [BACKENDS[n] for n in order if n in BACKENDS and BACKENDS[n] in installed]
+        installed = ranked + [cls for cls in installed if cls not in ranked]
+    else:
+        installed.sort(key=lambda cls: cls.default_rank)
+    return [cls() for cls in installed]
+
+def backend_order(backends: list[ExtractionBackend] | None = None) -> str:
+    """
+    Short hash of the cascade order (`available_backends()` by default). It
+    decides which backend's text wins, so every cache, checkpoint and job key
+    built from extracted text includes it.
+    """
+    backends = available_backends() if backends is None else backends
+    return hashlib.sha256(",".join(b.name for b in backends).encode()).hexdigest()[:8]
+
+# ---------- cascade ----------
+
+class CascadeExtractor:
+    """
+    Page text for one PDF, served by the fastest backend whose output passes
+    `is_plausible`. Backends are opened lazily, so slower ones cost nothing
+    unless a page actually escalates to them. Extracted pages are kept in a
+    TextStore; `page(i)` gives a view into it without copying the text, and
+    every page is also added to a PageIndex (`index`) for keyword lookups.
+
+    With a `cache_path` the store and index are loaded from there when they
+    exist and written back on `close()` if new pages were extracted.
+    """
+
+    def __init__(self, source, backends: list[ExtractionBackend] | None = None, cache_path: Path | None = None):
+        self.source = as_source(source)
+        self.backends = backends or available_backends()
+        self.cache_path = cache_path
+        self._handles = {}
+        self._store = None
+        self._index = None
+        self._loaded = 0
+        self.served_by = {}  # page index -> backend name ("cache" when loaded from disk)
+
+    def _handle(self, backend: ExtractionBackend):
+        if backend.name not in self._handles:
+            self._handles[backend.name] = backend.open(self.source)
+        return self._handles[backend.name]
+
+    @property
+    def page_count(self) -> int:
+        if self._store is not None:
+            return self._store.page_count
+        backend = self.backends[0]
+        return backend.page_count(self._handle(backend))
+
+    @property
+    def store(self) -> TextStore:
+        if self._store is None:
+            if self.cache_path is not None:
+                self._store = TextStore.load(self.cache_path)
+            if self._store is not None:
+                self._loaded = len(self._store)
+                self.served_by = {i: "cache" for i in range(self._store.page_count) if i in self._store}
+                self._index = PageIndex.load(index_cache_path(self.cache_path))
+            else:
+                self._store = TextStore(self.page_count)
+            if self._index is None:
+                self._index = PageIndex()
+            # An index saved before the store (or not at all) catches up from the stored text
+            for i in range(self._store.page_count):
+                if i in self._store and i not in self._index:
+                    self._index.add(i, self._store.page_text(i))
+        return self._store
+
+    @property
+    def index(self) -> PageIndex:
+        self.store
+        return self._index
+
+    def page(self, index: int) -> PageView:
+        store = self.store
+        if index not in store:
+            text = self._extract(index)
+            store.add(index, text)
+            self._index.add(index, text)
+        return store.page(index)
+
+    def adopt(self, store: TextStore, index: PageIndex):
+        """
+        Continue from the pages another extractor of the same PDF (and backend
+        order) already extracted, e.g. the one a report job parsed with.
+        """
+        if self._store is None:
+            self._store, self._index = store, index if index is not None else PageIndex()
+            self.served_by = {i: "adopted" for i in range(store.page_count) if i in store}
+            for i in self.served_by:
+                if i not in self._index:
+                    self._index.add(i, store.page_text(i))
+
+    def index_all(self) -> PageIndex:
+        """Extract (and index) every page the parsers have not needed yet."""
+        for i in range(self.page_count):
+            self.page(i)
+        return self.index
+
+    def text(self, index: int) -> str:
+        return self.page(index).text
+
+    def span_text(self, indices) -> str:
+        """`"\n".join` of several pages' text (pages out of range are skipped), sliced in one go when possible."""
+        indices = [i for i in indices if 0 <= i < self.store.page_count]
+        for i in indices:
+            self.page(i)
+        return self.store.span_text(indices)
+
+    def _extract(self, index: int) -> str:
+        fallback, fallback_name = "", None
+        for backend in self.backends:
+            try:
+                text = backend.page_text(self._handle(backend), index)
+            except Exception:
+                # A backend choking on a page is just another reason to escalate
+                text = ""
+            if is_plausible(text):
+                fallback, fallback_name = text, backend.name
+                break
+            # Keep the longest implausible answer in case no backend does better
+            if len(text.strip()) > len(fallback.strip()):
+                fallback, fallback_name = text, backend.name
+        self.served_by[index] = fallback_name
+        return fallback
+
+    def close(self):
+        for backend in self.backends:
+            handle = self._handles.pop(backend.name, None)
+            if handle is not None:
+                backend.close(handle)
+        if self._store is not None and self.cache_path is not None and len(self._store) > self._loaded:
+            self._store.save(self.cache_path)
+            self._index.save(index_cache_path(self.cache_path))
+        self._store = None
+        self._index = None
+
+
+def text_cache_path(source: PdfSource, backends: list[ExtractionBackend]) -> Path:
+    """Cache file for a PDF's text; keyed on the backend order too, since that decides which text wins."""
+    return Path.cwd() / TEXT_CACHE_DIR / f"{source.sha256}-{backend_order(backends)}.txtstore"
+
+def index_cache_path(text_cache: Path) -> Path:
+    return text_cache.with_suffix(".termindex")
+
+# ---------- calibration ----------
+
+def calibrate(pdf, sample: int = 25, seed: int = 0, save: bool = True) -> list[dict]:
+    """
+    Time every installed backend on the same random sample of pages and rank
+    them by seconds per page. The ranking is written to CALIBRATION_FILE
+    under the current working directory. A page a backend fails on counts as
+    not plausible.
+    """
+    source = as_source(pdf)
+    backends = [cls() for cls in BACKENDS.values() if cls.available()]
+    probe = backends[0]
+    handle = probe.open(source)
+    total = probe.page_count(handle)
+    probe.close(handle)
+    if total == 0:
+        raise ValueError("The PDF has no pages to calibrate on")
+    pages = sorted(random.Random(seed).sample(range(total), min(sample, total)))
+
+    results = []
+    for backend in backends:
+        start = time.perf_counter()
+        handle = backend.open(source)
+        opened = time.perf_counter() - start
+        plausible = chars = 0
+        start = time.perf_counter()
+        for i in pages:
+            try:
+                text = backend.page_text(handle, i)
+            except Exception:
+                continue  # a broken page in one library shouldn't stop the others being timed
+            plausible += is_plausible(text)
+            chars += len(text)
+        elapsed = time.perf_counter() - start
+        backend.close(handle)
+        results.append({
+            "backend": backend.name,
+            "open_s": round(opened, 4),
+            "per_page_ms": round(elapsed / len(pages) * 1000, 2),
+            "plausible_pct": round(plausible / len(pages) * 100, 1),
+            "chars": chars,
+        })
+
+    # Fastest first, but a backend that is noticeably less plausible than the best
+    # one goes to the back of the line however fast it is
+    best_plausible = max(r["plausible_pct"] for r in results)
+    results.sort(key=lambda r: (r["plausible_pct"] < best_plausible - PLAUSIBLE_TOLERANCE, r["per_page_ms"]))
+    if save:
+        path = Path.cwd() / CALIBRATION_FILE
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(json.dumps({
+            "ranking": [r["backend"] for r in results],
+            "pages": pages,
+            "results": results,
+        }, indent=2))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m catalog_parser.backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cal = sub.add_parser("calibrate", help="benchmark installed backends on a sample of pages")
+    cal.add_argument("pdf")
+    cal.add_argument("--sample", type=int, default=25)
+    cal.add_argument("--seed", type=int, default=0)
+    cal.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = calibrate(args.pdf, sample=args.sample, seed=args.seed, save=not args.no_save)
+    print(f"{'backend':<12} {'ms/page':>9} {'plausible':>10} {'chars':>9} {'open s':>8}")
+    for r in results:
+        print(f"{r['backend']:<12} {r['per_page_ms']:>9} {r['plausible_pct']:>9}% {r['chars']:>9} {r['open_s']:>8}")
+    if not args.no_save:
+        print(f"ranking saved to {Path.cwd() / CALIBRATION_FILE}")
+
+
+if __name__ == "__main__":
+    main()
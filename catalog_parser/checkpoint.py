@@ -0,0 +1,142 @@
+# catalog_parser/checkpoint.py
+'''
+Periodic checkpoints for long catalog parses.
+
+A checkpoint records, per PDF (keyed by SHA-256, parser version and extraction
+backend order), which stage of the page pipeline was running, the next
+physical page to scan, the candidates already seen and the enriched rows
+produced so far. Only whole
+pages are ever committed, so a retried parse resumes from the last committed
+page and produces exactly what an uninterrupted run would have.
+
+Opening a checkpoint claims it: the newest Checkpoint on a path owns it, and
+an older one (a cancelled job still winding down) stops writing or deleting it.
+'''
+import json
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+from . import PARSER_VERSION
+
+CHECKPOINT_DIR = Path("upl_file_bunker") / "checkpoints"  # resolved against the working directory when used
+CHECKPOINT_EVERY = 25  # pages between writes
+
+
+class Checkpoint:
+    """
+    `Checkpoint(None)` keeps progress in memory only, so parsers can use the
+    same code path whether or not resuming is enabled.
+    """
+
+    def __init__(self, path: Path | None, every: int = CHECKPOINT_EVERY):
+        self.path = Path(path) if path is not None else None
+        self.every = every
+        self.stage = None
+        self.next_page = 0
+        self.seen = []      # candidate keys already enriched (for de-duplication)
+        self.records = []   # enriched rows, in emission order
+        self._committed = (None, 0, 0, 0)  # stage, next_page, len(seen), len(records)
+        self._pages_since_save = 0
+        self.resumed = self._load()
+        self.owner = self._claim()
+
+    @classmethod
+    def for_source(cls, kind: str, source, directory: Path | None = None, **kwargs) -> "Checkpoint":
+        # Rows from one backend order must not resume under another: it picks the page text
+        from .backends import backend_order
+        directory = Path.cwd() / CHECKPOINT_DIR if directory is None else directory
+        return cls(Path(directory) / f"{kind}-v{PARSER_VERSION}-{backend_order()}-{source.sha256}.json", **kwargs)
+
+    def _load(self) -> bool:
+        if self.path is None:
+            return False
+        try:
+            state = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return False
+        if state.get("version") != PARSER_VERSION:
+            return False
+        self.stage = state["stage"]
+        self.next_page = state["next_page"]
+        self.seen = [tuple(key) for key in state["seen"]]
+        self.records = state["records"]
+        self._committed = (self.stage, self.next_page, len(self.seen), len(self.records))
+        return True
+
+    def _claim(self) -> str | None:
+        if self.path is None:
+            return None
+        owner = uuid.uuid4().hex
+        _write_atomic(self._owner_path, owner)
+        return owner
+
+    @property
+    def _owner_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".owner")
+
+    def superseded(self) -> bool:
+        """True once a newer Checkpoint has claimed (or cleared) this path."""
+        if self.path is None:
+            return False
+        try:
+            return self._owner_path.read_text() != self.owner
+        except OSError:
+            return True
+
+    # ---------- progress ----------
+
+    def add(self, record: dict, key: tuple | None = None):
+        if self.path is None:
+            return  # nothing to resume from, so don't hold a second copy of every row
+        if key is not None:
+            self.seen.append(key)
+        self.records.append(record)
+
+    def advance(self, stage: str, next_page: int):
+        """
+        Mark every page before `next_page` of `stage` as fully processed and
+        write the checkpoint every `every` pages.
+        """
+        self.stage, self.next_page = stage, next_page
+        self._committed = (stage, next_page, len(self.seen), len(self.records))
+        self._pages_since_save += 1
+        if self._pages_since_save >= self.every:
+            self.save()
+
+    # ---------- persistence ----------
+
+    def save(self):
+        stage, next_page, n_seen, n_records = self._committed
+        if self.path is None or stage is None or self.superseded():
+            return
+        _write_atomic(self.path, json.dumps({
+            "version": PARSER_VERSION,
+            "stage": stage,
+            "next_page": next_page,
+            "seen": self.seen[:n_seen],
+            "records": [dict(r) for r in self.records[:n_records]],
+        }))
+        self._pages_since_save = 0
+
+    def clear(self):
+        """Drop the checkpoint once the parse has completed."""
+        if self.path is None or self.superseded():
+            return
+        self.path.unlink(missing_ok=True)
+        self._owner_path.unlink(missing_ok=True)
+
+
+def _write_atomic(path: Path, text: str):
+    # A unique temp file per write, so concurrent writers never share one;
+    # os.replace is atomic, so a crash mid-write keeps the previous file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,144 @@
+# catalog_parser/detectors.py
+'''
+Single-pass program detection.
+
+A `Detector` describes one kind of program heading: the printed page range it
+can appear in, which top-of-page lines it looks at and what a heading looks
+like. `scan_catalog` walks the catalog once; on each page it works out the
+printed page number (text layer first, pdfplumber only if no registered range
+matched), takes the page head once, and runs every detector whose range
+contains the page. Adding a credential type means registering another
+Detector, not another pass over the document.
+
+Pages that are not extracted yet are first put through a PagePrefilter built
+from the detectors' signatures (see catalog_parser.prefilter), so pages that
+cannot hold any of the headings are never extracted by the scan.
+'''
+import re
+from typing import Callable, Iterable, Iterator
+
+from . import ruleprof
+from .prefilter import page_prefilter
+from .source import LazyPlumber, PdfSource, as_source
+
+PRINTED_PAGE_NUMBER = re.compile(r"\s*(\d{3,4})\s*")  # a footer line holding only the page number
+FOOTER_LINES = 40           # bottom lines searched for the printed page number
+FALLBACK_FOOTER_LINES = 10  # same, in pdfplumber's text
+
+
+class Detector:
+    """
+    `first`..`last` is the printed page range the heading can appear in.
+    `window(head)` picks the candidate lines from the page's first `head_lines`
+    (already stripped); every 1-3 line combination of them is tried in order,
+    combinations containing a `stop_phrases` entry are skipped, and the first
+    one `match(combo)` turns into a name (anything but None) is the page's hit.
+
+    `signature` is a tuple of byte patterns that every page with a hit shows
+    in its raw content streams; a scan only prefilters pages when every
+    detector has one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        first: int,
+        last: int,
+        match: Callable[[str], str | None],
+        head_lines: int = 40,
+        window: Callable[[list[str]], list[str]] | None = None,
+        stop_phrases: Iterable[str] = (),
+        max_span: int = 3,
+        signature: Iterable[re.Pattern] = ()
+    ):
+        self.name = name
+        self.first = first
+        self.last = last
+        self.match = match
+        self.head_lines = head_lines
+        self.window = window or (lambda head: head)
+        self.stop_phrases = tuple(stop_phrases)
+        self.max_span = max_span
+        self.signature = tuple(signature)
+
+    def covers(self, printed_page: int) -> bool:
+        return self.first <= printed_page <= self.last
+
+    def stopped(self, combo_lower: str) -> bool:
+        if ruleprof.PROFILE is not None:
+            return ruleprof.PROFILE.any_in(f"{self.name}.stop_phrases", self.stop_phrases, combo_lower)
+        return any(phrase in combo_lower for phrase in self.stop_phrases)
+
+    def detect(self, head: list[str]) -> str | None:
+        lines = self.window(head[:self.head_lines])
+        for j in range(len(lines)):
+            for span in range(1, self.max_span + 1):
+                combo = " ".join(lines[j:j + span]).replace("•", "").strip()
+                if self.stopped(combo.lower()):
+                    continue
+                found = self.match(combo)
+                if found is not None:
+                    return found
+        return None
+
+
+def printed_page_number(page, covers: Callable[[int], bool], fallback=None) -> int | None:
+    """
+    The printed page number of a page: the lowest footer line holding just a
+    3-4 digit number that `covers` accepts. `fallback()` (pdfplumber's lines)
+    is only consulted when the text layer has none.
+    """
+    for k in reversed(range(max(0, page.line_count - FOOTER_LINES), page.line_count)):
+        m = page.fullmatch_line(PRINTED_PAGE_NUMBER, k)
+        if m and covers(int(m.group(1))):
+            return int(m.group(1))
+    if fallback is None:
+        return None
+    # pdfplumber's footer is read more loosely: any integer line (pages below 100 only show up here)
+    for line in reversed(fallback()[-FALLBACK_FOOTER_LINES:]):
+        try:
+            number = int(line.strip())
+        except ValueError:
+            continue
+        if covers(number):
+            return number
+    return None
+
+
+def scan_catalog(
+    pdf_path: "str | PdfSource",
+    detectors: list[Detector],
+    pages: Iterable[int],
+    on_page: Callable[[int], None] | None = None
+) -> Iterator[tuple[str, str, int]]:
+    """
+    Yield (detector name, heading, printed page) for every hit, page by page in
+    the order of `pages`; on a page several detectors cover, they run in
+    registration order.
+    """
+    source = as_source(pdf_path)
+    texts = source.extractor()
+    plumber = LazyPlumber(source)
+    covers = lambda number: any(d.covers(number) for d in detectors)
+    head_lines = max(d.head_lines for d in detectors)
+    prefilter = page_prefilter(source, [d.signature for d in detectors])
+
+    try:
+        for i in pages:
+            if on_page:
+                on_page(i)  # every page before i has been fully handled by the consumer
+            if prefilter is not None and i not in texts.store and not prefilter.may_match(i):
+                continue  # no heading can be on this page; it is not extracted
+            page = texts.page(i)
+            number = printed_page_number(page, covers, lambda: plumber.page(i).extract_text().splitlines())
+            if number is None:
+                continue
+            active = [d for d in detectors if d.covers(number)]
+            # The top of the page is materialised once for every detector
+            head = [line.strip() for line in page.iter_lines(0, head_lines)]
+            for detector in active:
+                found = detector.detect(head)
+                if found is not None:
+                    yield detector.name, found, number
+    finally:
+        plumber.close()
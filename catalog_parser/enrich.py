@@ -0,0 +1,138 @@
+# catalog_parser/enrich.py
+'''
+Shared enrichment stage for both parsers.
+
+A program's text window is normalised once (lower-cased, joined, upper-cased
+per line) and every feature question is answered from that single copy, with
+regex results cached per window so no pattern scans the same text twice. A
+window that knows which catalog pages it came from first asks the catalog's
+PageIndex, and keyword checks the index rules out never touch the text.
+'''
+import re
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from . import ruleprof
+
+if TYPE_CHECKING:
+    from .pageindex import PageIndex
+
+
+class PrioritySearch:
+    """
+    An ordered rule list: `first(text)` tries each compiled pattern in order
+    with `re.search` and keeps the first one that matches. Plain searches keep
+    the regex engine's literal-prefix scan, which a single combined lookahead
+    over every position loses; callers share one normalised window and cache
+    the answer per window (see ProgramWindow.first).
+
+    A table with a `name` shows up under it in the rule profile (see
+    catalog_parser.ruleprof); while profiling, its rules are tried one by one.
+    """
+
+    def __init__(self, patterns: list[str], flags: int = 0, name: str | None = None):
+        self.patterns = list(patterns)
+        self.name = name
+        self.compiled = [re.compile(pattern, flags) for pattern in self.patterns]
+
+    def first(self, text: str) -> tuple[int, tuple] | None:
+        """
+        Return (rule index, captured groups) of the highest-priority match, or None.
+        """
+        if ruleprof.PROFILE is not None and self.name:
+            hit = ruleprof.PROFILE.first(self.name, self.compiled, text)
+            return (hit[0], hit[1].groups()) if hit else None
+        for idx, pattern in enumerate(self.compiled):
+            m = pattern.search(text)
+            if m:
+                return idx, m.groups()
+        return None
+
+
+class ProgramWindow:
+    """
+    Normalised view of the text around one program (a few pages or a block of lines).
+
+    `index` and `pages` (optional) say which indexed catalog pages the text was
+    taken from; `contains_any` uses them to skip keywords those pages lack.
+    """
+    __slots__ = ("text", "_lines", "lower", "_joined", "_upper_lines", "_cache", "index", "pages")
+
+    def __init__(self, text: str, lines: list[str] | None = None, index: "PageIndex | None" = None, pages=()):
+        self.text = text
+        self._lines = lines  # split on first use; most questions only need `lower`
+        self.lower = text.lower()
+        self._joined = None
+        self._upper_lines = None
+        self._cache = {}
+        self.index = index
+        self.pages = tuple(pages)
+
+    @classmethod
+    def from_lines(cls, lines: list[str], index: "PageIndex | None" = None, pages=()) -> "ProgramWindow":
+        return cls("\n".join(lines), list(lines), index, pages)
+
+    @property
+    def lines(self) -> list[str]:
+        if self._lines is None:
+            self._lines = self.text.splitlines()
+        return self._lines
+
+    @property
+    def joined(self) -> str:
+        # Lines joined with spaces, lower-cased (the form the keyword checks use)
+        if self._joined is None:
+            self._joined = " ".join(self.lines).lower()
+        return self._joined
+
+    @property
+    def upper_lines(self) -> list[str]:
+        if self._upper_lines is None:
+            self._upper_lines = [line.upper() for line in self.lines]
+        return self._upper_lines
+
+    def search(self, pattern: re.Pattern):
+        """Cached `pattern.search` over the lower-cased text."""
+        key = ("search", pattern)
+        if key not in self._cache:
+            self._cache[key] = pattern.search(self.lower)
+        return self._cache[key]
+
+    def first(self, rules: PrioritySearch):
+        """Cached `rules.first` over the lower-cased text."""
+        key = ("first", rules)
+        if key not in self._cache:
+            self._cache[key] = rules.first(self.lower)
+        return self._cache[key]
+
+    def contains_any(self, keywords, joined: bool = False) -> bool:
+        if self.index is not None:
+            keywords = [k for k in keywords if self.index.may_contain(k, self.pages)]
+            if not keywords:
+                return False
+        haystack = self.joined if joined else self.lower
+        return any(k in haystack for k in keywords)
+
+
+def as_window(source) -> ProgramWindow:
+    """
+    Accept a window, a text string or a list of lines and return a window.
+    """
+    if isinstance(source, ProgramWindow):
+        return source
+    if isinstance(source, str):
+        return ProgramWindow(source)
+    return ProgramWindow.from_lines(list(source))
+
+
+def dedupe_candidates(programs: Iterable[tuple[str, int]], normalize=None) -> Iterator[tuple[str, int]]:
+    """
+    Drop repeated (name, page) candidates, keeping the first occurrence and the
+    original order. Lazy, so it also works on candidates streamed from a scan.
+    """
+    seen = set()
+    for name, page in programs:
+        key = (normalize(name) if normalize else name, page)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield name, page
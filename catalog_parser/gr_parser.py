@@ -1,12 +1,21 @@
 # parser/gr_parser.py
 import pandas as pd
-import streamlit as st
 import re
+from functools import lru_cache
 from pathlib import Path
-from PyPDF2 import PdfReader
-import pdfplumber
-from openpyxl.utils import get_column_letter
-from openpyxl import load_workbook
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+from . import ruleprof
+from .enrich import PrioritySearch, ProgramWindow, as_window, dedupe_candidates
+from .checkpoint import Checkpoint
+from .quicklook import QuickLook
+from .records import GR_COLUMNS, ProgramFrameBuilder, ProgramRecord, records_frame
+from .scheduler import JobCancelled
+from .detectors import Detector, scan_catalog
+from .source import PdfSource, as_source
+
+# PDF libraries are imported by the extraction backends on first use
+if TYPE_CHECKING:
+    from .backends import CascadeExtractor
 
 # Global Constraints
 OFFSET = 51  # skip Roman numeral pages
@@ -45,10 +54,11 @@ REPLACEMENTS = {
 DEGREE_PATTERN = "|".join(DEGREE_SUFFIXES)
 MAJOR_REGEX = re.compile(rf"^([A-Z][\w\s&/-]+),\s*({DEGREE_PATTERN})\.?$", re.IGNORECASE)
 GC_REGEX = re.compile(r"([\w:()&’'\/,\-.\s]*?Graduate Certificate)\s*\.{3,}\s*(\d{3,4})")
+MAJOR_TITLE = re.compile(rf"^([A-Z].*?),\s*({DEGREE_PATTERN})\.?$")
 
 # Extract raw lines from PDF
-def extract_catalog_lines(pdf_path: Path) -> list:
-    with pdfplumber.open(str(pdf_path)) as pdf:
+def extract_catalog_lines(pdf_path: Path | PdfSource) -> list:
+    with as_source(pdf_path).plumber() as pdf:
         lines = []
         for page in pdf.pages:
             text = page.extract_text()
@@ -86,178 +96,141 @@ def merge_wrapped_lines(lines: list) -> list:
         cleaned.append(buffer.strip())
     return cleaned
 
+# ---------- program detectors ----------
+
+@lru_cache(maxsize=1)
+def degree_titles() -> list[re.Pattern]:
+    # MAJOR_TITLE with one suffix each, so the rule profile can see which suffix matches
+    return [re.compile(rf"^([A-Z].*?),\s*({suffix})\.?$") for suffix in DEGREE_SUFFIXES]
+
+def match_major(combo: str) -> str | None:
+    if ruleprof.PROFILE is not None:
+        ruleprof.PROFILE.first("gr.DEGREE_SUFFIXES", degree_titles(), combo, labels=DEGREE_SUFFIXES)
+    match = MAJOR_TITLE.match(combo)
+    if not match:
+        return None
+    return normalize_program_name(f"{match.group(1).strip()}, {match.group(2).strip()}")
+
+def major_header(head: list[str]) -> list[str]:
+    # Non-empty lines above the "College of ..." line
+    block = []
+    for line in head:
+        if line == "":
+            continue
+        if line.lower().startswith("college of "):
+            break
+        block.append(line)
+    return block
+
+def match_gc(combo: str) -> str | None:
+    combo_lower = combo.lower()
+    if (
+        "graduate certificate" in combo_lower
+        and combo_lower.startswith(tuple("abcdefghijklmnopqrstuvwxyz"))
+        and 3 <= len(combo.split()) <= 22
+    ):
+        return combo
+    return None
+
+# Raw-stream signatures (whitespace and non-ASCII dropped, see catalog_parser.prefilter)
+MAJOR_SIGNATURE = re.compile(rf",(?:{DEGREE_PATTERN})".encode())
+GC_SIGNATURE = re.compile(rb"graduatecertificate", re.IGNORECASE)
+
+MAJORS = Detector(
+    "majors", 3, 761, match_major, head_lines=40, window=major_header, stop_phrases=STOP_PHRASES,
+    signature=(MAJOR_SIGNATURE,)
+)
+GRAD_CERTIFICATES = Detector(
+    "gcs", 763, 981, match_gc, head_lines=30, stop_phrases=STOP_PHRASES, signature=(GC_SIGNATURE,)
+)
+
+# Everything the graduate scan looks for; each page is visited once for all of them
+GR_DETECTORS = [MAJORS, GRAD_CERTIFICATES]
+
+def _scan(pdf_path, detectors, start, on_page, pages) -> Iterator[tuple[str, int]]:
+    source = as_source(pdf_path)
+    # Skip the first OFFSET pages (Roman numerals) and only process the numbered section
+    if pages is None:
+        pages = range(max(start, OFFSET), source.extractor().page_count)
+    for _, name, page_number in scan_catalog(source, detectors, pages, on_page):
+        yield name, page_number
+
 # Extract majors
-def extract_programs_from_catalog(pdf_path: Path) -> list:
+def iter_programs_from_catalog(
+    pdf_path: Path | PdfSource,
+    start: int = OFFSET,
+    on_page: Callable[[int], None] | None = None,
+    pages: Iterable[int] | None = None
+) -> Iterator[tuple[str, int]]:
+    """
+    Yield (program name, printed page) candidates as soon as each page is scanned,
+    starting at physical page `start` (or visiting only `pages`, in that order).
+    """
+    return _scan(pdf_path, [MAJORS], start, on_page, pages)
+
+def extract_programs_from_catalog(pdf_path: Path | PdfSource) -> list:
     """
     Extract graduate programs from the catalog while skipping the Roman numeral pages.
 
     OFFSET is used to skip the initial front matter with Roman numeral page numbering.
+    `pdf_path` may be a path or an in-memory PdfSource.
     """
-    reader = PdfReader(str(pdf_path))
-    programs = []
-
-    # Skip the first OFFSET pages (Roman numerals) and only process the numbered section
-    for i, page in enumerate(reader.pages[OFFSET:], start=OFFSET):
-        text = page.extract_text() or ""
-        lines = text.splitlines()
-
-        printed_page_number = None
-
-        # Try to detect the printed page number from the last ~40 lines of the page
-        for line in reversed(lines[-40:]):
-            if re.fullmatch(r"\d{3,4}", line.strip()):
-                num = int(line.strip())
-                if 3 <= num <= 761:  # valid major section page range
-                    printed_page_number = num
-                    break
-
-        # Fallback with pdfplumber if PyPDF2 missed it
-        if not printed_page_number:
-            with pdfplumber.open(str(pdf_path)) as pdf:
-                text_lines = pdf.pages[i].extract_text().splitlines()
-                for line in reversed(text_lines[-10:]):
-                    try:
-                        num = int(line.strip())
-                        if 3 <= num <= 761:
-                            printed_page_number = num
-                            break
-                    except ValueError:
-                        continue
-
-        # If we still can’t find a printed page number, skip
-        if not printed_page_number:
-            continue
-
-        # Collect header block for possible program titles
-        header_block = []
-        for line in lines[:40]:
-            stripped = line.strip()
-            if stripped == "":
-                continue
-            if stripped.lower().startswith("college of "):
-                break
-            header_block.append(stripped)
-
-        # Look for valid program title + degree suffix
-        for j in range(len(header_block)):
-            for span in range(1, 4):  # check 1-line, 2-line, or 3-line combos
-                combo = " ".join(header_block[j:j+span]).replace("•", "").strip()
-                combo_lower = combo.lower()
-                if any(phrase in combo_lower for phrase in STOP_PHRASES):
-                    continue
-
-                match = re.match(rf"^([A-Z].*?),\s*({DEGREE_PATTERN})\.?$", combo)
-                if match:
-                    raw_program = f"{match.group(1).strip()}, {match.group(2).strip()}"
-                    program = normalize_program_name(raw_program)
-                    programs.append((program, printed_page_number))
-                    break
-            else:
-                # continue outer loop if inner didn't break
-                continue
-            # break outer loop if we found a match
-            break
-
-    return programs
+    return list(iter_programs_from_catalog(pdf_path))
 
 # Extract graduate certificates
-def extract_gcs(pdf_path: Path) -> list:
+def iter_gcs(
+    pdf_path: Path | PdfSource,
+    start: int = OFFSET,
+    on_page: Callable[[int], None] | None = None,
+    pages: Iterable[int] | None = None
+) -> Iterator[tuple[str, int]]:
+    """
+    Yield (certificate title, printed page) candidates as soon as each page is scanned,
+    starting at physical page `start` (or visiting only `pages`, in that order).
+    """
+    return _scan(pdf_path, [GRAD_CERTIFICATES], start, on_page, pages)
+
+def extract_gcs(pdf_path: Path | PdfSource) -> list:
     """
     Extract graduate certificates from the catalog while skipping the Roman numeral pages.
 
     OFFSET is used to skip the initial front matter with Roman numeral page numbering.
+    `pdf_path` may be a path or an in-memory PdfSource.
     """
-    reader = PdfReader(str(pdf_path))
-    gcs = []
-
-    # Skip the first OFFSET pages (Roman numerals) and only process the numbered section
-    for i, page in enumerate(reader.pages[OFFSET:], start=OFFSET):
-        text = page.extract_text() or ""
-        lines = text.splitlines()
-
-        printed_page_number = None
-
-        # Try to detect the printed page number from the last ~40 lines of the page
-        for line in reversed(lines[-40:]):
-            try:
-                num = int(line.strip())
-                if 763 <= num <= 981:  # valid Graduate Certificate section page range
-                    printed_page_number = num
-                    break
-            except ValueError:
-                continue
-
-        # Fallback with pdfplumber if PyPDF2 missed it
-        if not printed_page_number:
-            with pdfplumber.open(str(pdf_path)) as pdf:
-                text_lines = pdf.pages[i].extract_text().splitlines()
-                for line in reversed(text_lines[-10:]):
-                    try:
-                        num = int(line.strip())
-                        if 763 <= num <= 981:
-                            printed_page_number = num
-                            break
-                    except ValueError:
-                        continue
-
-        # If we still can’t find a printed page number, skip
-        if not printed_page_number:
-            continue
-
-        # Look for Graduate Certificate titles near the top of the page
-        found_gc = False
-        for j in range(len(lines[:30])):  # scan first ~30 lines for GC titles
-            for span in range(1, 4):  # check 1-line, 2-line, or 3-line combos
-                combo = " ".join(line.strip() for line in lines[j:j+span])
-                combo_clean = combo.replace("•", "").strip()
-                combo_lower = combo_clean.lower()
-
-                # Skip lines with known stop phrases
-                if any(phrase in combo_lower for phrase in STOP_PHRASES):
-                    continue
-
-                # Check if it's a Graduate Certificate title
-                if (
-                    "graduate certificate" in combo_lower
-                    and combo_lower.startswith(tuple("abcdefghijklmnopqrstuvwxyz"))
-                    and 3 <= len(combo_clean.split()) <= 22
-                ):
-                    gcs.append((combo_clean, printed_page_number))
-                    found_gc = True
-                    break
-
-            if found_gc:
-                break
-
-    return gcs
+    return list(iter_gcs(pdf_path))
 def modality(text):
-    t = text.lower()
-    return "Online" if "online" in t else "Hybrid" if "hybrid" in t else "Campus"
+    window = as_window(text)
+    return "Online" if window.contains_any(["online"]) else "Hybrid" if window.contains_any(["hybrid"]) else "Campus"
+
+LICENSE_KEYWORDS = [
+    "state-approved program", "leads to certification", "eligible for teacher certification",
+    "teacher preparation program", "florida teacher certification exam",
+    "eligible for the endorsements", "licensure", "professional certification",
+    "meets certification requirements"
+]
 
 def has_license_prep(lines: list) -> str:
-    text = " ".join(lines).lower()
-    keywords = [
-        "state-approved program", "leads to certification", "eligible for teacher certification",
-        "teacher preparation program", "florida teacher certification exam",
-        "eligible for the endorsements", "licensure", "professional certification",
-        "meets certification requirements"
-    ]
-    return "Yes" if any(k in text for k in keywords) else "No"
+    return "Yes" if as_window(lines).contains_any(LICENSE_KEYWORDS, joined=True) else "No"
+
+CONCENTRATION_HEADING = re.compile(r"^concentration[s]?:", re.MULTILINE)
+CONCENTRATION_SECTION = re.compile(r"concentration[s]?:([\s\S]{0,300})")
+CONCENTRATION_BULLET = re.compile(r"[-•]\s*[a-z]")
 
 def detect_concentration(text):
-    text_lower = text.lower()
+    window = as_window(text)
+    text_lower = window.lower
 
     # Look for explicit concentration headings
-    if re.search(r"^concentration[s]?:", text_lower, re.MULTILINE):
+    if window.search(CONCENTRATION_HEADING):
         return "Yes"
     if "students may choose one of the following concentrations" in text_lower:
         return "Yes"
 
     # OPTIONAL: only consider it if there are multiple bullet points after "Concentrations"
-    conc_section = re.search(r"concentration[s]?:([\s\S]{0,300})", text_lower)
+    conc_section = window.search(CONCENTRATION_SECTION)
     if conc_section:
         # If there are at least 2 bullet points in the section, assume real concentrations
-        bullets = re.findall(r"[-•]\s*[a-z]", conc_section.group(1))
+        bullets = CONCENTRATION_BULLET.findall(conc_section.group(1))
         if len(bullets) >= 2:
             return "Yes"
 
@@ -280,27 +253,21 @@ def get_hour_patterns() -> list[str]:
         r"([0-9]{1,3})\s*credits?\b"
     ]
 
+# Post-bachelor and "beyond the master's" totals win over the generic patterns
+HOUR_RULES = PrioritySearch([
+    r"(\d{2,3})\s+(?:credit|hours|minimum)?\s*\(post[-\s]?bachelor",
+    r"total\s+minimum\s+required\s+hours\s*[-–:]\s*(\d{1,3})\s+hours\s+beyond",
+    *get_hour_patterns(),
+], flags=re.I, name="gr.HOUR_RULES")
+
 def find_hours(text: str) -> int | None:
-    text_lower = text.lower()
-    bach_match = re.search(r"(\d{2,3})\s+(?:credit|hours|minimum)?\s*\(post[-\s]?bachelor", text_lower)
-    if bach_match:
-        return int(bach_match.group(1))
-    beyond_ma = re.search(r"total\s+minimum\s+required\s+hours\s*[-–:]\s*(\d{1,3})\s+hours\s+beyond", text_lower)
-    if beyond_ma:
-        return int(beyond_ma.group(1))
-    for pat in get_hour_patterns():
-        m = re.search(pat, text_lower, flags=re.I)
-        if m:
-            return int(m.group(1))
-    return None
+    hit = as_window(text).first(HOUR_RULES)
+    return int(hit[1][0]) if hit else None
 
-def grab_text(reader: PdfReader, page_number: int, range_len: int = 1) -> tuple[str, list[str]]:
-    parts = []
-    for p in range(page_number - 1, page_number - 1 + range_len + 1):
-        if 0 <= p < len(reader.pages):
-            parts.append(reader.pages[p].extract_text() or "")
-    full_text = "\n".join(parts)
-    return full_text, full_text.splitlines()
+def grab_window(texts: "CascadeExtractor", page_number: int, range_len: int = 1) -> ProgramWindow:
+    """Text of pages page_number-1 .. page_number-1+range_len, taken from the text store in one slice."""
+    pages = range(max(0, page_number - 1), min(texts.page_count, page_number + range_len))
+    return ProgramWindow(texts.span_text(pages), index=texts.index, pages=pages)
 
 def classify_credential(abbrev: str) -> str:
     ab = re.sub(r"[^\w]", "", abbrev).upper()
@@ -313,46 +280,138 @@ def classify_credential(abbrev: str) -> str:
     else:
         return "Other"
 
+def enrich_program(program_name: str, page_number: int, window: ProgramWindow) -> ProgramRecord:
+    """
+    Compute every report column for one program from its normalised text window.
+    """
+    credential = program_name.split(",")[-1].strip()
+    is_cert = "CERT" in credential.upper()
+    edu_obj = "Grad Cert" if is_cert else classify_credential(credential)
+    concentration_status = "No" if is_cert else detect_concentration(window)
+    if concentration_status == "Yes":
+        prog_type = "Major with Concentration"
+    elif is_cert:
+        prog_type = "Grad Cert"
+    elif edu_obj in ["Masters", "Doctorate"]:
+        prog_type = "Major"
+    else:
+        prog_type = "Other"
+    return ProgramRecord(
+        GR_COLUMNS,
+        name=program_name,
+        accredited="No" if window.contains_any(["not accredited"]) else "Yes",
+        educational_objective=edu_obj,
+        concentrations=concentration_status,
+        credit_hours=find_hours(window),
+        length_measurement="Semester",
+        full_time_enrollment=9,
+        page_number=page_number,
+        license_prep=has_license_prep(window),
+        modality=modality(window),
+        program_type=prog_type,
+    )
+
+def iter_gr_records(
+    core_pdf,
+    checkpoint: Checkpoint | None = None,
+    quick: QuickLook | None = None,
+    cancelled: Callable[[], bool] | None = None
+) -> Iterator[ProgramRecord]:
+    """
+    Yield one enriched report row per graduate program, as soon as it is found.
+    The catalog is walked once with every detector in GR_DETECTORS (majors and
+    graduate certificates), so rows come in page order.
+
+    With a `checkpoint`, rows committed by an interrupted run are replayed first
+    and scanning resumes from the last committed page. With `quick`, only the
+    pages the quick-look plan hands out before its deadline are visited.
+    `cancelled()` is checked before every page; once it is true the scan stops
+    with JobCancelled (the checkpoint is saved first).
+    """
+    source = as_source(core_pdf)
+    texts = source.extractor()
+    checkpoint = checkpoint or Checkpoint(None)
+    # Same program found on the same page more than once only needs enriching once
+    seen = set(checkpoint.seen)
+    completed = False
+
+    yield from list(checkpoint.records)
+    try:
+        start = max(OFFSET, checkpoint.next_page) if checkpoint.resumed else OFFSET
+        pages = quick.pages("programs", start, texts.page_count) if quick else range(start, texts.page_count)
+        def on_page(i):
+            checkpoint.advance("programs", i)
+            if cancelled is not None and cancelled():
+                raise JobCancelled()
+        for _, name, page_number in scan_catalog(source, GR_DETECTORS, pages, on_page):
+            program_name = normalize_program_name(name)
+            key = (program_name, page_number)
+            if key in seen:
+                continue
+            record = enrich_program(program_name, page_number, grab_window(texts, page_number, range_len=2))
+            seen.add(key)
+            checkpoint.add(record, key)
+            yield record
+        completed = True
+        checkpoint.clear()
+    finally:
+        if not completed:
+            checkpoint.save()
+
 # Build DataFrame
-def build_program_dataframe(pdf_path: Path, programs: list[tuple[str, int]]) -> pd.DataFrame:
-    reader = PdfReader(str(pdf_path))
+def build_program_dataframe(pdf_path: Path | PdfSource, programs: list[tuple[str, int]]) -> pd.DataFrame:
+    texts = as_source(pdf_path).extractor()
     rows = []
-    for program_name, page_number in programs:
-        program_name = normalize_program_name(program_name)
-        text, lines = grab_text(reader, page_number, range_len=2)
-        hours = find_hours(text)
-        credential = program_name.split(",")[-1].strip()
-        is_cert = "CERT" in credential.upper()
-        edu_obj = "Grad Cert" if is_cert else classify_credential(credential)
-        concentration_status = "No" if is_cert else detect_concentration(text)
-        if concentration_status == "Yes":
-            prog_type = "Major with Concentration"
-        elif is_cert:
-            prog_type = "Grad Cert"
-        elif edu_obj in ["Masters", "Doctorate"]:
-            prog_type = "Major"
-        else:
-            prog_type = "Other"
-        rows.append({
-            "Program Name": program_name,
-            "Accredited": "No" if re.search(r"not accredited", text, flags=re.I) else "Yes",
-            "Educational Objective": edu_obj,
-            "Concentrations? Yes or No": concentration_status,
-            "Total Credit Hours in Program": hours,
-            "Program Length Measurement": "Semester",
-            "Full-Time Enrollment": 9,
-            "Page Number": page_number,
-            "License Prep": has_license_prep(lines),
-            "Modality": modality(text),
-            "Type": prog_type,
-        })
-    return pd.DataFrame(rows)
+    # Same program found on the same page more than once only needs enriching once
+    candidates = dedupe_candidates(
+        (normalize_program_name(name), page) for name, page in programs
+    )
+    for program_name, page_number in candidates:
+        rows.append(enrich_program(program_name, page_number, grab_window(texts, page_number, range_len=2)))
+    return records_frame(rows, GR_COLUMNS)
 
 
 # Main Function for Execution
-def run_gr_parser(core_pdf: str) -> pd.DataFrame:
-    pdf_path = Path(core_pdf)
-    majors = extract_programs_from_catalog(pdf_path)
-    gcs = extract_gcs(pdf_path)
-    all_programs = majors + gcs
-    return build_program_dataframe(pdf_path, all_programs)
\ No newline at end of file
+def run_gr_parser(
+    core_pdf,
+    on_program: Callable[[dict], None] | None = None,
+    resume: bool = False,
+    time_budget: float | None = None,
+    sample_rate: float | None = None,
+    pages: tuple[int, int] | None = None,
+    section: str | None = None
+) -> pd.DataFrame:
+    """
+    Parse the graduate catalog. `core_pdf` may be a path, bytes, an uploaded
+    file or a PdfSource; all passes share one in-memory copy.
+
+    `on_program` is called with each row as soon as it has been enriched.
+    With `resume`, progress is checkpointed and a retry continues where the
+    previous attempt stopped.
+
+    A `time_budget` (seconds) and/or `sample_rate` (fraction of pages) makes it a
+    quick look: section-start pages first, whatever is found in time is returned,
+    and `df.attrs["quick_look"]` lists the page ranges that were skipped.
+    `pages` (1-based, inclusive) or `section` (a bookmark title such as a
+    college's name) limit a quick look to that part of the catalog.
+    """
+    source = as_source(core_pdf)
+    quick = QuickLook.for_source(source, time_budget, sample_rate, pages, section)
+    if quick and resume:
+        raise ValueError("A quick look only covers part of the catalog and cannot be resumed")
+    checkpoint = Checkpoint.for_source("gr", source) if resume else None
+    rows = ProgramFrameBuilder(GR_COLUMNS)
+    try:
+        for record in iter_gr_records(source, checkpoint=checkpoint, quick=quick):
+            rows.add(record)
+            if on_program:
+                on_program(record)
+    finally:
+        if source is not core_pdf:
+            source.close()  # opened here; also writes the text cache when enabled
+    df = rows.frame()
+    if quick:
+        # Pages were visited out of order; majors (pp. 3-761) still sort before certificates
+        df = df.sort_values("Page Number", kind="stable", ignore_index=True)
+        df.attrs["quick_look"] = quick.summary()
+    return df
@@ -1,34 +1,437 @@
 # catalog_parser/merge.py
+import atexit
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import Callable, Iterator
 import pandas as pd
-from . import gr_parser, ug_parser
+from . import PARSER_VERSION, gr_parser, ug_parser
+from .checkpoint import Checkpoint
+from .pageindex import PageIndex, snippet, tokenize
+from .records import GR_COLUMNS, UG_COLUMNS, ProgramFrameBuilder, records_frame
+from .scheduler import Job, JobCancelled, get_scheduler
+from .source import as_source
+from .textstore import TextStore
+
+GRADUATE = "Graduate"
+UNDERGRADUATE = "Undergraduate"
+
+SEARCHABLE_CATALOGS = 4   # indexed catalogs kept in memory for search
+WORKER_RETRIES = 1        # a report job whose worker crashes is resumed once on a fresh worker
+INDEX_PROGRESS_EVERY = 25 # pages between progress items (and cancellation checks) of an index job
+_searchable = OrderedDict()   # PDF sha256 -> (TextStore, PageIndex) of every page, most recently used last
+_parsed_text = OrderedDict()  # PDF sha256 -> file with the text + index of the pages a report job extracted
+_searchable_lock = threading.Lock()
+
+def iter_catalog_records(
+    grad_pdf,
+    ug_pdf,
+    resume: bool = False,
+    cancelled: Callable[[], bool] | None = None
+) -> Iterator[tuple[str, dict]]:
+    """
+    Yield (catalog, row) pairs as each program is found and enriched:
+    the whole graduate catalog first, then the undergraduate one.
+    With `resume`, each catalog is checkpointed and picks up where a previous
+    attempt on the same PDF stopped. `cancelled()` is checked before every page;
+    once it is true the parse raises JobCancelled.
+    """
+    for label, kind, pdf, records in (
+        (GRADUATE, "gr", grad_pdf, gr_parser.iter_gr_records),
+        (UNDERGRADUATE, "ug", ug_pdf, ug_parser.iter_program_names),
+    ):
+        source = as_source(pdf)
+        checkpoint = Checkpoint.for_source(kind, source) if resume else None
+        try:
+            for record in records(source, checkpoint=checkpoint, cancelled=cancelled):
+                yield label, record
+        finally:
+            # Release backend handles for sources opened here; callers own the ones they pass in
+            if source is not pdf:
+                source.close()
+
+# ---------- catalog search ----------
+
+def _remember_searchable(sha256: str, store, index):
+    with _searchable_lock:
+        _searchable[sha256] = (store, index)
+        _searchable.move_to_end(sha256)
+        while len(_searchable) > SEARCHABLE_CATALOGS:
+            _searchable.popitem(last=False)
+
+def _remember_parsed(sha256: str, path: str):
+    with _searchable_lock:
+        old = _parsed_text.pop(sha256, None)
+        _parsed_text[sha256] = path
+        while len(_parsed_text) > SEARCHABLE_CATALOGS:
+            _remove_parsed(_parsed_text.popitem(last=False)[1])
+    if old is not None and old != path:
+        _remove_parsed(old)
+
+def _remove_parsed(path: str):
+    for p in (path, path + ".index"):
+        try:
+            os.unlink(p)
+        except OSError:
+            pass
+
+@atexit.register
+def _remove_all_parsed():
+    with _searchable_lock:
+        paths = list(_parsed_text.values())
+        _parsed_text.clear()
+    for path in paths:
+        _remove_parsed(path)
+
+def save_parsed_text(source) -> str:
+    """
+    Write the text and index of the pages `source` has extracted so far to a
+    temporary file and return its path. Report jobs hand this (not the text
+    itself) back to the server; an index job later continues from it.
+    """
+    texts = source.extractor()
+    fd, path = tempfile.mkstemp(prefix=f"catalog-{source.sha256[:12]}-", suffix=".txtstore")
+    os.close(fd)
+    texts.store.save(path)
+    texts.index.save(path + ".index")
+    return path
+
+def index_job_items(source, parsed: str | None = None) -> Iterator[tuple[str, object]]:
+    """
+    Body of an index job, run in a pool worker (or in-process without one):
+    extracts and indexes every page of `source`, starting from the `parsed`
+    file a report job saved (see `save_parsed_text`) when given. Yields
+    ("progress", pages done) now and then, and ("searchable", (store, index))
+    at the end.
+    """
+    from .workers import cancel_requested
+    try:
+        texts = source.extractor()
+        store = TextStore.load(parsed) if parsed is not None else None
+        if store is not None:
+            texts.adopt(store, PageIndex.load(parsed + ".index"))
+        for i in range(texts.page_count):
+            if cancel_requested():
+                raise JobCancelled()
+            texts.page(i)
+            if (i + 1) % INDEX_PROGRESS_EVERY == 0:
+                yield "progress", i + 1
+        yield "searchable", (texts.store, texts.index)
+    finally:
+        source.close()
+
+def submit_index(pdf) -> Job:
+    """
+    Queue indexing of every page of a catalog on the process-wide scheduler
+    (and the worker pool when it is enabled). Searches of the same catalog
+    share one job; the job result is (TextStore, PageIndex).
+    """
+    from .backends import backend_order
+    from .workers import TaskCancelled, get_pool
+
+    source = as_source(pdf)
+    key = ("index", source.sha256, PARSER_VERSION, backend_order())
+
+    def run(job: Job):
+        with _searchable_lock:
+            kept = _searchable.get(source.sha256)
+            parsed = _parsed_text.get(source.sha256)
+        if kept is not None:
+            source.close()
+            return kept
+        pool = get_pool()
+        if pool is None:
+            items = index_job_items(source, parsed)
+        else:
+            items = pool.run("catalog_parser.merge", "index_job_items", source, parsed,
+                             cancelled=job.cancel_requested)
+        try:
+            for kind, item in items:
+                job.check_cancelled()
+                if kind == "searchable":
+                    kept = item
+        except TaskCancelled:
+            raise JobCancelled()
+        finally:
+            items.close()
+            source.close()
+        _remember_searchable(source.sha256, *kept)
+        with _searchable_lock:
+            parsed = _parsed_text.pop(source.sha256, None)
+        if parsed is not None:
+            _remove_parsed(parsed)
+        return kept
+
+    job = get_scheduler().submit(key, run)
+    if job.fn is not run:
+        source.close()
+    return job
+
+def catalog_index(pdf):
+    """
+    (TextStore, PageIndex) of every page of a catalog. The first search of a
+    catalog indexes it on the scheduler, continuing from the text its report
+    job extracted; later searches use the kept index.
+    """
+    return catalog_indexes({None: pdf})[None]
+
+def catalog_indexes(catalogs: dict) -> dict:
+    """`catalog_index` of each of {label: pdf}, indexing the missing ones side by side."""
+    kept, jobs = {}, {}
+    for label, pdf in catalogs.items():
+        source = as_source(pdf)
+        with _searchable_lock:
+            kept[label] = _searchable.get(source.sha256)
+            if kept[label] is not None:
+                _searchable.move_to_end(source.sha256)
+        if kept[label] is None:
+            jobs[label] = submit_index(source)
+        elif source is not pdf:
+            source.close()
+    try:
+        for label, job in jobs.items():
+            kept[label] = job.outcome()
+    finally:
+        # Leaving early (the script reran): stop indexing unless another search wants it
+        for job in jobs.values():
+            if not job.done():
+                get_scheduler().release(job)
+    return kept
+
+def search_catalogs(catalogs: dict, query: str, context: int = 60) -> pd.DataFrame:
+    """
+    Every occurrence of the phrase `query` in the given {label: pdf} catalogs,
+    one row per hit with the PDF page and the surrounding text.
+    """
+    words = len(tokenize(query))
+    rows = []
+    for label, (store, index) in catalog_indexes(catalogs).items():
+        for page, position in index.phrase(query):
+            rows.append({
+                "Catalog": label,
+                "PDF Page": page + 1,
+                "Context": snippet(store.page_text(page), position, words, context),
+            })
+    return pd.DataFrame(rows, columns=["Catalog", "PDF Page", "Context"])
+
+def frame_from_records(gr_rows, ug_rows) -> pd.DataFrame:
+    """
+    Combined report frame, same column layout as concatenating the two parser
+    outputs. Each side may be a list of rows or a filled ProgramFrameBuilder.
+    """
+    return pd.concat([records_frame(gr_rows, GR_COLUMNS), records_frame(ug_rows, UG_COLUMNS)], ignore_index=True)
+
+def _builders() -> dict[str, ProgramFrameBuilder]:
+    return {GRADUATE: ProgramFrameBuilder(GR_COLUMNS), UNDERGRADUATE: ProgramFrameBuilder(UG_COLUMNS)}
+
+def catalog_job_items(grad_src, ug_src, cancelled: Callable[[], bool] | None = None) -> Iterator[tuple[str, tuple]]:
+    """
+    Body of a report job, run in a pool worker (or in-process without one):
+    ("record", (catalog, row)) for every program, then ("parsed", (sha256,
+    path)) naming a file with the pages each catalog's parse extracted, which
+    a later index job (see `submit_index`) continues from instead of starting
+    over. In a worker, `cancelled` defaults to the server's cancel request.
+    """
+    if cancelled is None:
+        from .workers import cancel_requested as cancelled
+    try:
+        for catalog, record in iter_catalog_records(grad_src, ug_src, resume=True, cancelled=cancelled):
+            yield "record", (catalog, record)
+        for source in (grad_src, ug_src):
+            yield "parsed", (source.sha256, save_parsed_text(source))
+    finally:
+        grad_src.close()
+        ug_src.close()
+
+def submit_catalogs(grad_pdf, ug_pdf) -> Job:
+    """
+    Queue a resumable parse of both catalogs on the process-wide scheduler.
+
+    Sessions submitting the same two PDFs (by content hash) under the same parser
+    version and extraction backend order share one job: its `records` fill with (catalog, row) pairs as the
+    parse goes and its result is the combined frame. The parse itself runs on the
+    warm worker pool (catalog_parser.workers) when it is enabled.
+    """
+    from .backends import backend_order
+    from .workers import TaskCancelled, WorkerCrashed, get_pool
+
+    grad_src, ug_src = as_source(grad_pdf), as_source(ug_pdf)
+    key = ("catalogs", grad_src.sha256, ug_src.sha256, PARSER_VERSION, backend_order())
+
+    def run(job: Job) -> pd.DataFrame:
+        rows = _builders()
+        pool = get_pool()
+        for attempt in range(WORKER_RETRIES + 1):
+            if pool is None:
+                items = catalog_job_items(grad_src, ug_src, cancelled=job.cancel_requested)
+            else:
+                items = pool.run("catalog_parser.merge", "catalog_job_items", grad_src, ug_src,
+                                 cancelled=job.cancel_requested)
+            # A retry resumes from the checkpoint and replays the rows already published
+            skip = len(job.records)
+            try:
+                for kind, item in items:
+                    if kind == "parsed":
+                        _remember_parsed(*item)
+                        continue
+                    if skip:
+                        skip -= 1
+                        continue
+                    job.check_cancelled()
+                    catalog, record = item
+                    rows[catalog].add(record)
+                    job.publish(item)
+                break
+            except TaskCancelled:
+                raise JobCancelled()
+            except WorkerCrashed:
+                if attempt == WORKER_RETRIES:
+                    raise
+            finally:
+                items.close()
+        return frame_from_records(rows[GRADUATE], rows[UNDERGRADUATE])
+
+    job = get_scheduler().submit(key, run)
+    if job.fn is not run:
+        # Coalesced onto a job already in flight; these copies are not needed
+        grad_src.close()
+        ug_src.close()
+    return job
+
+def quick_look_catalogs(
+    grad_pdf,
+    ug_pdf,
+    time_budget: float | None = None,
+    sample_rate: float | None = None,
+    section: str | None = None
+) -> tuple[pd.DataFrame, dict[str, dict]]:
+    """
+    Quick-look parse of both catalogs (see run_gr_parser). The graduate catalog
+    gets half the time budget and the undergraduate one whatever is left.
+    With `section`, each catalog only scans the part under the first bookmark
+    whose title contains it (e.g. one college); a catalog without one is skipped.
+    Returns the combined preview and each catalog's quick-look summary.
+    """
+    started = time.monotonic()
+    grad_src, ug_src = as_source(grad_pdf), as_source(ug_pdf)
+    try:
+        grad_df = gr_parser.run_gr_parser(
+            grad_src, time_budget=None if time_budget is None else time_budget / 2, sample_rate=sample_rate,
+            section=section
+        )
+        remaining = None if time_budget is None else max(0.0, time_budget - (time.monotonic() - started))
+        ug_df = ug_parser.run_ug_parser(ug_src, time_budget=remaining, sample_rate=sample_rate, section=section)
+    finally:
+        for src, pdf in ((grad_src, grad_pdf), (ug_src, ug_pdf)):
+            if src is not pdf:
+                src.close()
+    summaries = {GRADUATE: grad_df.attrs["quick_look"], UNDERGRADUATE: ug_df.attrs["quick_look"]}
+    return pd.concat([grad_df, ug_df], ignore_index=True), summaries
+
+def quick_look_items(grad_src, ug_src, *args) -> Iterator[tuple[str, tuple]]:
+    """Body of a quick-look job, run in a pool worker (or in-process): one ("preview", (df, summaries))."""
+    try:
+        yield "preview", quick_look_catalogs(grad_src, ug_src, *args)
+    finally:
+        grad_src.close()
+        ug_src.close()
+
+def submit_quick_look(
+    grad_pdf,
+    ug_pdf,
+    time_budget: float | None = None,
+    sample_rate: float | None = None,
+    section: str | None = None
+) -> Job:
+    """
+    Queue `quick_look_catalogs` on the process-wide scheduler (and the worker
+    pool when it is enabled), so previews count against the same concurrency
+    limit as reports. The time budget starts once the job runs; identical
+    previews in flight share one job. The job result is (preview, summaries).
+    """
+    from .backends import backend_order
+    from .workers import TaskCancelled, get_pool
+
+    grad_src, ug_src = as_source(grad_pdf), as_source(ug_pdf)
+    args = (time_budget, sample_rate, section)
+    key = ("quick_look", grad_src.sha256, ug_src.sha256, *args, PARSER_VERSION, backend_order())
+
+    def run(job: Job):
+        pool = get_pool()
+        if pool is None:
+            items = quick_look_items(grad_src, ug_src, *args)
+        else:
+            items = pool.run("catalog_parser.merge", "quick_look_items", grad_src, ug_src, *args,
+                             cancelled=job.cancel_requested)
+        try:
+            for kind, item in items:
+                if kind == "preview":
+                    return item
+        except TaskCancelled:
+            raise JobCancelled()
+        finally:
+            items.close()
+            grad_src.close()
+            ug_src.close()
+
+    job = get_scheduler().submit(key, run)
+    if job.fn is not run:
+        grad_src.close()
+        ug_src.close()
+    return job
 
 def combine_catalogs(
     grad_pdf,
     ug_pdf,
-    output_name: str = "combined_catalog.xlsx"
-) -> tuple[pd.DataFrame, str]:
+    output_name: str = "combined_catalog.xlsx",
+    persist_uploads: bool = False,
+    save_output: bool = True,
+    on_program: Callable[[str, dict], None] | None = None,
+    resume: bool = False
+) -> tuple[pd.DataFrame, str | None]:
     """
     Merge parsed graduate & undergraduate catalogs.
     Saves the combined output and returns both the dataframe and path.
+
+    The uploads are parsed straight from memory. With `persist_uploads` a copy of
+    each PDF is also written to `upl_file_bunker` in the background. With
+    `save_output=False` no report file is written and the returned path is None.
+    `on_program(catalog, row)` is called for every program as soon as it is found.
+    With `resume`, a retried call continues from the last checkpoint.
     """
     storage_dir = Path.cwd() / "upl_file_bunker"
-    storage_dir.mkdir(exist_ok=True)
+    if persist_uploads or save_output:
+        storage_dir.mkdir(exist_ok=True)
 
-    # ---------- persist uploads ----------
-    grad_path = storage_dir / "grad_catalog_upl.pdf"
-    ug_path   = storage_dir / "ug_catalog_upl.pdf"
+    # ---------- load uploads once ----------
+    grad_src = as_source(grad_pdf)
+    ug_src = as_source(ug_pdf)
 
-    grad_path.write_bytes(grad_pdf.read())
-    ug_path.write_bytes(ug_pdf.read())
+    if persist_uploads:
+        grad_src.persist(storage_dir / "grad_catalog_upl.pdf")
+        ug_src.persist(storage_dir / "ug_catalog_upl.pdf")
 
     # ---------- parse PDFs ----------
-    gr_df = gr_parser.run_gr_parser(str(grad_path))
-    ug_df = ug_parser.run_ug_parser(str(ug_path))
-    combined_df = pd.concat([gr_df, ug_df], ignore_index=True)
+    try:
+        rows = _builders()
+        for catalog, record in iter_catalog_records(grad_src, ug_src, resume=resume):
+            rows[catalog].add(record)
+            if on_program:
+                on_program(catalog, record)
+        combined_df = frame_from_records(rows[GRADUATE], rows[UNDERGRADUATE])
+    finally:
+        # Also when a parse or an on_program callback raises; sources the caller passed in stay open
+        for src, pdf in ((grad_src, grad_pdf), (ug_src, ug_pdf)):
+            if src is not pdf:
+                src.close()
 
     # ---------- save output ----------
+    if not save_output:
+        return combined_df, None
     output_path = storage_dir / output_name
     combined_df.to_excel(output_path, index=False)
 
-    return combined_df, str(output_path)
\ No newline at end of file
+    return combined_df, str(output_path)
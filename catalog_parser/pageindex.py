@@ -0,0 +1,212 @@
+# catalog_parser/pageindex.py
+'''
+Inverted term index over a catalog's pages.
+
+Every page's lower-cased text is split into word terms and each occurrence is
+recorded as (page, position). That answers two kinds of question without
+rescanning text:
+
+    index.phrase("fully online")           -> [(page, position), ...]
+    index.may_contain("licensure", pages)  -> False if it cannot occur there
+
+`may_contain` is a substring test, not a word test: it only answers False when
+no arrangement of the pages' terms could contain the keyword (its first word
+may end a longer term and its last word may start one), so the enrichment code
+can skip a keyword check on the index's word and still get the same answer.
+The index is kept next to the page-text cache; see CascadeExtractor.
+'''
+import json
+import re
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+
+TERM = re.compile(r"\w+")
+POSITION_BITS = 20                  # postings are page << POSITION_BITS | position
+MAX_POSITIONS = 1 << POSITION_BITS  # terms indexed per page
+FORMAT_VERSION = 1
+
+
+def tokenize(text: str) -> list[str]:
+    return TERM.findall(text.lower())
+
+
+@lru_cache(maxsize=1024)
+def _constraints(keyword: str) -> tuple[tuple[str, bool, bool], ...]:
+    # (word, may extend left, may extend right) for each word of the keyword
+    keyword = keyword.lower()
+    return tuple((m.group(), m.start() == 0, m.end() == len(keyword)) for m in TERM.finditer(keyword))
+
+
+def _fits(term: str, word: str, open_left: bool, open_right: bool) -> bool:
+    if open_left and open_right:
+        return word in term
+    if open_left:
+        return term.endswith(word)
+    if open_right:
+        return term.startswith(word)
+    return term == word
+
+
+def _has_any(terms: array, ids: set) -> bool:
+    # Is any id in `ids` among the sorted `terms` of a page?
+    if len(ids) < len(terms):
+        for tid in ids:
+            k = bisect_left(terms, tid)
+            if k < len(terms) and terms[k] == tid:
+                return True
+        return False
+    return any(tid in ids for tid in terms)
+
+
+def snippet(text: str, position: int, words: int = 1, width: int = 60) -> str:
+    """The text around the `position`-th term of a page (as counted by the index), on one line."""
+    lower = text.lower()
+    if len(lower) != len(text):
+        text = lower  # lower() changed the length, so offsets only hold in the lower-cased copy
+    for k, m in enumerate(TERM.finditer(lower)):
+        if k == position:
+            start = m.start()
+            break
+    else:
+        return ""
+    end = start
+    for k, m in enumerate(TERM.finditer(lower, start)):
+        end = m.end()
+        if k + 1 == words:
+            break
+    left, right = max(0, start - width), min(len(text), end + width)
+    return ("…" if left else "") + " ".join(text[left:right].split()) + ("…" if right < len(text) else "")
+
+
+class PageIndex:
+    """
+    Term postings for the pages added so far, in any order. Term ids are
+    assigned in first-seen order and never change, so lookups cached against
+    the vocabulary only need to look at terms added since.
+    """
+
+    def __init__(self):
+        self.terms = []          # term id -> term
+        self._ids = {}           # term -> term id
+        self._postings = []      # term id -> array of page << POSITION_BITS | position
+        self._page_terms = {}    # page -> sorted array of the term ids on it
+        self._fitting = {}       # keyword word constraint -> [terms checked, set of fitting term ids]
+
+    def __contains__(self, page: int) -> bool:
+        return page in self._page_terms
+
+    def __len__(self) -> int:
+        return len(self._page_terms)
+
+    # ---------- building ----------
+
+    def add(self, page: int, text: str):
+        if page in self._page_terms:
+            return
+        on_page = set()
+        for position, term in enumerate(tokenize(text)):
+            if position >= MAX_POSITIONS:
+                break
+            tid = self._ids.get(term)
+            if tid is None:
+                tid = self._ids[term] = len(self.terms)
+                self.terms.append(term)
+                self._postings.append(array("q"))
+            self._postings[tid].append(page << POSITION_BITS | position)
+            on_page.add(tid)
+        self._page_terms[page] = array("q", sorted(on_page))
+
+    # ---------- queries ----------
+
+    def _fitting_ids(self, constraint: tuple[str, bool, bool]) -> set:
+        entry = self._fitting.setdefault(constraint, [0, set()])
+        checked, ids = entry
+        for tid in range(checked, len(self.terms)):
+            if _fits(self.terms[tid], *constraint):
+                ids.add(tid)
+        entry[0] = len(self.terms)
+        return ids
+
+    def may_contain(self, keyword: str, pages) -> bool:
+        """
+        False only if `keyword` cannot be a substring of the lower-cased text of
+        `pages` (joined by any whitespace). Pages that are not indexed count as
+        possibly containing anything.
+        """
+        pages = list(pages)
+        if not all(p in self._page_terms for p in pages):
+            return True
+        constraints = _constraints(keyword)
+        if not constraints:
+            return True
+        return all(
+            any(_has_any(self._page_terms[p], self._fitting_ids(c)) for p in pages)
+            for c in constraints
+        )
+
+    def phrase(self, query: str) -> list[tuple[int, int]]:
+        """(page, position of the first word) of every occurrence of the query's words in sequence."""
+        words = tokenize(query)
+        if not words or any(w not in self._ids for w in words):
+            return []
+        # Intersect from the rarest word so the candidate set starts small
+        order = sorted(enumerate(words), key=lambda item: len(self._postings[self._ids[item[1]]]))
+        hits = None
+        for offset, word in order:
+            starts = {code - offset for code in self._postings[self._ids[word]] if code & (MAX_POSITIONS - 1) >= offset}
+            hits = starts if hits is None else hits & starts
+            if not hits:
+                return []
+        return sorted((code >> POSITION_BITS, code & (MAX_POSITIONS - 1)) for code in hits)
+
+    def pages(self, query: str) -> list[int]:
+        """Pages holding the query phrase, in page order."""
+        return sorted({page for page, _ in self.phrase(query)})
+
+    # ---------- persistence ----------
+
+    def save(self, path):
+        """Write a JSON header line (terms, table lengths), then the postings and page tables."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pages = list(self._page_terms)
+        header = {
+            "format": FORMAT_VERSION,
+            "terms": self.terms,
+            "postings": [len(p) for p in self._postings],
+            "pages": pages,
+            "page_terms": [len(self._page_terms[p]) for p in pages],
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            for postings in self._postings:
+                f.write(postings.tobytes())
+            for page in pages:
+                f.write(self._page_terms[page].tobytes())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path) -> "PageIndex | None":
+        """The index saved at `path`, or None if it is missing or unreadable."""
+        index = cls()
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("format") != FORMAT_VERSION:
+                    return None
+                index.terms = header["terms"]
+                index._ids = {term: tid for tid, term in enumerate(index.terms)}
+                for length in header["postings"]:
+                    postings = array("q")
+                    postings.frombytes(f.read(length * postings.itemsize))
+                    index._postings.append(postings)
+                for page, length in zip(header["pages"], header["page_terms"]):
+                    terms = array("q")
+                    terms.frombytes(f.read(length * terms.itemsize))
+                    index._page_terms[page] = terms
+        except (OSError, ValueError, KeyError):
+            return None
+        return index
@@ -0,0 +1,282 @@
+# catalog_parser/prefilter.py
+'''
+Cheap "could this page start a program?" test on a page's raw content streams.
+
+Text extraction (and the pdfplumber page-number fallback behind it) is the
+expensive part of a scan, and most catalog pages are course descriptions or
+requirement tables. Before a page is extracted, its content streams (and those
+of the forms it draws) are decompressed and the strings they show are pulled
+out with a regex; with whitespace and non-ASCII bytes dropped, a page can only
+hold a program heading if it matches a parser's rule, e.g. a comma followed by
+a degree suffix, or "graduatecertificate".
+
+The test only says no when it can read the page: every font on it must be a
+simple font with a standard Latin encoding and no ToUnicode map, so the string
+bytes are the text. Anything else (CID / Type3 fonts, custom encodings,
+ToUnicode maps, inline images) counts as a possible match and is extracted as
+before.
+
+    python -m catalog_parser.prefilter benchmark [catalog.pdf --parser gr ...]
+
+parses the synthetic load-test catalogs (and any PDFs given) with and without
+the prefilter and reports the pages skipped and the programs it missed.
+It is off by default; set OVS_PAGE_PREFILTER=1 to use it once the benchmark
+shows no misses on the catalogs you parse.
+'''
+import argparse
+import os
+import re
+import time
+from typing import Iterable
+
+from .source import PdfSource, as_source
+
+ENABLED = os.environ.get("OVS_PAGE_PREFILTER") == "1"
+MAX_FORM_DEPTH = 3
+
+SIMPLE_FONTS = {"/Type1", "/MMType1", "/TrueType"}
+LATIN_ENCODINGS = {"/WinAnsiEncoding", "/MacRomanEncoding", "/StandardEncoding"}
+# Standard 14 fonts whose built-in encoding is StandardEncoding (Symbol / ZapfDingbats are not)
+STANDARD_LATIN_FONTS = {
+    f"{family}{style}"
+    for family, styles in (
+        ("Helvetica", ("", "-Bold", "-Oblique", "-BoldOblique")),
+        ("Courier", ("", "-Bold", "-Oblique", "-BoldOblique")),
+        ("Times", ("-Roman", "-Bold", "-Italic", "-BoldItalic")),
+    )
+    for style in styles
+}
+
+# A literal string (one level of balanced parentheses inside) or a hex string
+SHOWN_STRING = re.compile(
+    rb"\(((?:[^()\\]++|\\.|\((?:[^()\\]++|\\.)*+\))*+)\)|<([0-9A-Fa-f\s]*+)>",
+    re.S,
+)
+ESCAPE = re.compile(rb"\\([0-7]{1,3}|\r\n|.)", re.S)
+ESCAPED = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f", b"\r\n": b"", b"\r": b"", b"\n": b""}
+INLINE_IMAGE = re.compile(rb"(?<![^\s])BI\s")  # image data could hide or fake a string
+NOT_TEXT = re.compile(rb"[^\x21-\x7e]+")        # whitespace, bullets and other non-ASCII bytes
+
+
+def _unescape(match) -> bytes:
+    code = match.group(1)
+    if code[:1].isdigit():
+        return bytes([int(code, 8) & 0xFF])
+    return ESCAPED.get(code, code)
+
+
+def shown_text(content: bytes) -> bytes:
+    """The strings of a content stream, concatenated with whitespace and non-ASCII bytes dropped."""
+    parts = []
+    for m in SHOWN_STRING.finditer(content):
+        if m.group(2) is not None:
+            digits = re.sub(rb"\s", b"", m.group(2))
+            parts.append(bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode()))
+        elif b"\\" in m.group(1):
+            parts.append(ESCAPE.sub(_unescape, m.group(1)))
+        else:
+            parts.append(m.group(1))
+    return NOT_TEXT.sub(b"", b"".join(parts))
+
+
+def _legible_font(font) -> bool:
+    # Do this font's string bytes read as ASCII text?
+    font = font.get_object()
+    if font.get("/Subtype") not in SIMPLE_FONTS:
+        return False
+    if "/ToUnicode" in font:
+        return False  # the extractors read text through the map (ligatures, renumbered subset glyphs)
+    encoding = font.get("/Encoding")
+    if encoding is not None:
+        encoding = encoding.get_object()
+    if hasattr(encoding, "get"):
+        if "/Differences" in encoding:
+            return False
+        encoding = encoding.get("/BaseEncoding")
+    if encoding is None:
+        return str(font.get("/BaseFont", "")).lstrip("/") in STANDARD_LATIN_FONTS
+    return encoding in LATIN_ENCODINGS
+
+
+def _stream_data(contents) -> bytes:
+    contents = contents.get_object()
+    if isinstance(contents, list):
+        return b"\n".join(part.get_object().get_data() for part in contents)
+    return contents.get_data()
+
+
+def raw_page_text(page) -> bytes | None:
+    """
+    `shown_text` of a PyPDF2 page and the forms it uses, or None if the page
+    cannot be read that way (illegible font, inline image, nested too deep).
+    """
+    parts, seen = [], set()
+
+    def collect(obj, content, resources, depth) -> bool:
+        if depth > MAX_FORM_DEPTH:
+            return False
+        seen.add(id(obj))
+        data = _stream_data(content) if content is not None else b""
+        if INLINE_IMAGE.search(data):
+            return False
+        resources = obj.get("/Resources", resources)
+        resources = resources.get_object() if resources is not None else {}
+        fonts = resources.get("/Font")
+        if fonts is not None and not all(_legible_font(f) for f in fonts.get_object().values()):
+            return False
+        parts.append(shown_text(data))
+        xobjects = resources.get("/XObject")
+        for xobject in (xobjects.get_object().values() if xobjects is not None else ()):
+            xobject = xobject.get_object()
+            if id(xobject) in seen or xobject.get("/Subtype") != "/Form":
+                continue
+            if not collect(xobject, xobject, resources, depth + 1):
+                return False
+        return True
+
+    if not collect(page, page.get("/Contents"), None, 0):
+        return None
+    return b"".join(parts)
+
+
+class PagePrefilter:
+    """
+    `may_match(i)` is False only when page `i` can be read from its content
+    streams and matches none of `rules`. A rule is a tuple of byte patterns
+    that must all occur in the page's `raw_page_text`.
+    """
+
+    def __init__(self, source: "str | PdfSource", rules: Iterable[Iterable[re.Pattern]]):
+        self.source = as_source(source)
+        self.rules = [tuple(rule) for rule in rules]
+        self.checked = self.skipped = self.unreadable = 0
+
+    def check(self, index: int) -> bool | None:
+        """True / False for a readable page, None when it cannot tell."""
+        try:
+            text = raw_page_text(self.source.reader().pages[index])
+        except Exception:
+            text = None  # a damaged page is left to the extractors
+        if text is None:
+            return None
+        return any(all(p.search(text) for p in rule) for rule in self.rules)
+
+    def may_match(self, index: int) -> bool:
+        result = self.check(index)
+        self.checked += 1
+        self.unreadable += result is None
+        self.skipped += result is False
+        return result is not False
+
+
+def page_prefilter(source, rules) -> PagePrefilter | None:
+    """A PagePrefilter, or None unless OVS_PAGE_PREFILTER=1 and every scan target has a rule."""
+    rules = list(rules)
+    if not ENABLED or not rules or not all(rules):
+        return None
+    return PagePrefilter(source, rules)
+
+# ---------- benchmark ----------
+
+def _parsers():
+    from . import gr_parser, ug_parser
+    return {
+        "gr": (gr_parser.run_gr_parser, [d.signature for d in gr_parser.GR_DETECTORS]),
+        "ug": (ug_parser.run_ug_parser, ug_parser.UG_PREFILTER),
+    }
+
+def _rows(df) -> list[tuple]:
+    return sorted(tuple(str(v) for v in row) for row in df.itertuples(index=False))
+
+def benchmark(pdf, parser: str) -> dict:
+    """
+    Parse `pdf` with and without the prefilter. A false negative is a program
+    row the full parse produced and the prefiltered one did not.
+    """
+    global ENABLED
+    run, rules = _parsers()[parser]
+    data = as_source(pdf).data
+
+    timings, rows = {}, {}
+    enabled = ENABLED
+    try:
+        for mode in (False, True):
+            ENABLED = mode
+            start = time.perf_counter()
+            rows[mode] = _rows(run(bytes(data)))
+            timings[mode] = time.perf_counter() - start
+    finally:
+        ENABLED = enabled
+
+    source = PdfSource(bytes(data))
+    prefilter = PagePrefilter(source, rules)
+    pages = len(source.reader().pages)
+    start = time.perf_counter()
+    for i in range(pages):
+        prefilter.may_match(i)
+    prefilter_s = time.perf_counter() - start
+
+    missed = list(rows[False])
+    for row in rows[True]:
+        if row in missed:
+            missed.remove(row)
+    return {
+        "pages": pages,
+        "skipped": prefilter.skipped,
+        "unreadable": prefilter.unreadable,
+        "programs": len(rows[False]),
+        "missed": len(missed),
+        "fn_rate_pct": round(len(missed) / len(rows[False]) * 100, 2) if rows[False] else 0.0,
+        "prefilter_ms_per_page": round(prefilter_s / pages * 1000, 3),
+        "full_s": round(timings[False], 3),
+        "prefiltered_s": round(timings[True], 3),
+    }
+
+def synthetic_corpus() -> list[tuple[str, bytes, str]]:
+    """
+    (label, PDF bytes, parser) for the load-test catalogs, in every font style
+    (plain Helvetica, an "fi" ligature through ToUnicode, a subset font with
+    renumbered glyphs), uncompressed and Flate-compressed.
+    """
+    from utils.loadtest import FONT_STYLES, synthetic_grad_catalog, synthetic_ug_catalog
+    corpus = []
+    for style in FONT_STYLES:
+        for compress in (False, True):
+            suffix = f"{style}{' z' if compress else ''}"
+            corpus += [
+                (f"grad 60+15 {suffix}", synthetic_grad_catalog(60, 15, seed=3, style=style, compress=compress), "gr"),
+                (f"ug 60 {suffix}", synthetic_ug_catalog(60, seed=3, style=style, compress=compress), "ug"),
+            ]
+    return corpus
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m catalog_parser.prefilter")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("benchmark", help="false-negative rate and pages skipped against full parsing")
+    bench.add_argument("pdfs", nargs="*")
+    bench.add_argument("--parser", choices=["gr", "ug"], action="append", default=[],
+                       help="parser for each PDF, in order (default gr)")
+    bench.add_argument("--no-synthetic", action="store_true")
+    args = parser.parse_args(argv)
+
+    corpus = [] if args.no_synthetic else synthetic_corpus()
+    kinds = args.parser + ["gr"] * (len(args.pdfs) - len(args.parser))
+    corpus += [(os.path.basename(path), path, kind) for path, kind in zip(args.pdfs, kinds)]
+
+    print(f"{'catalog':<24} {'pages':>6} {'skipped':>8} {'unread':>7} {'programs':>9} {'missed':>7} {'FN %':>6} "
+          f"{'ms/page':>8} {'full s':>7} {'filt s':>7}")
+    totals = {"programs": 0, "missed": 0}
+    for label, pdf, kind in corpus:
+        r = benchmark(pdf, kind)
+        totals["programs"] += r["programs"]
+        totals["missed"] += r["missed"]
+        print(f"{label[:24]:<24} {r['pages']:>6} {r['skipped']:>8} {r['unreadable']:>7} {r['programs']:>9} "
+              f"{r['missed']:>7} {r['fn_rate_pct']:>6} {r['prefilter_ms_per_page']:>8} {r['full_s']:>7} {r['prefiltered_s']:>7}")
+    rate = totals["missed"] / totals["programs"] * 100 if totals["programs"] else 0.0
+    print(f"false negatives: {totals['missed']} of {totals['programs']} programs ({rate:.2f}%)")
+
+
+if __name__ == "__main__":
+    # Run the package's copy of this module: that is the one whose settings the parsers read
+    from .prefilter import main
+    main()
@@ -0,0 +1,208 @@
+# catalog_parser/quicklook.py
+'''
+Time-budgeted "quick look" parsing.
+
+Instead of walking every page in order, a quick look visits section-start pages
+first (the PDF outline's bookmark targets), then the remaining pages in a spread
+order (middle, quarters, eighths, ...) so that wherever the deadline cuts the
+scan off, coverage is even across the catalog. An optional sample rate thins
+the non-priority pages up front. The pages never reached are reported as ranges.
+
+A quick look can also be limited to a page range or to one section of the
+catalog, e.g. a single college, found by its bookmark title in the outline.
+'''
+import math
+import time
+from collections import deque
+from typing import Iterator
+
+from .source import as_source
+
+
+def outline_entries(source) -> list[tuple[int, str, int]]:
+    """(depth, title, 0-based page) of every PDF outline (bookmark) entry, in outline order."""
+    reader = as_source(source).reader()
+    entries = []
+
+    def walk(items, depth):
+        for item in items:
+            if isinstance(item, list):
+                walk(item, depth + 1)  # children of the entry before it
+                continue
+            try:
+                entries.append((depth, str(item.title), reader.get_destination_page_number(item)))
+            except Exception:
+                pass  # dangling or malformed bookmark
+
+    try:
+        walk(reader.outline, 0)
+    except Exception:
+        return []
+    return entries
+
+
+def outline_pages(source) -> set[int]:
+    """0-based pages the PDF outline (bookmarks) points at; empty if there is none."""
+    return {page for _, _, page in outline_entries(source)}
+
+
+def section_pages(source, section: str) -> tuple[str, int, int] | None:
+    """
+    (title, first, last) of the first outline entry whose title contains
+    `section` (case-insensitive): pages first..last-1, up to the next entry at
+    the same or a higher level. None if no entry matches.
+    """
+    entries = outline_entries(source)
+    wanted = section.casefold()
+    for k, (depth, title, first) in enumerate(entries):
+        if wanted in title.casefold():
+            last = next(
+                (page for d, _, page in entries[k + 1:] if d <= depth and page > first),
+                len(as_source(source).reader().pages),
+            )
+            return title, first, last
+    return None
+
+
+def spread(items: list) -> list:
+    """Reorder so that every prefix is spread evenly over the original sequence."""
+    order, queue = [], deque([(0, len(items))])
+    while queue:
+        lo, hi = queue.popleft()
+        if lo >= hi:
+            continue
+        mid = (lo + hi) // 2
+        order.append(items[mid])
+        queue.append((lo, mid))
+        queue.append((mid + 1, hi))
+    return order
+
+
+def plan_pages(first: int, last: int, priority=(), sample_rate: float | None = None) -> list[int]:
+    """Visit order for pages first..last-1: priority pages, then a (sampled) spread of the rest."""
+    priority = {p for p in priority if first <= p < last}
+    head = sorted(priority)
+    rest = spread([p for p in range(first, last) if p not in priority])
+    if sample_rate is not None and sample_rate < 1:
+        # A prefix of the spread order rather than every n-th page, which can
+        # line up with a catalog's page rhythm and miss every header page
+        rest = rest[:math.ceil(len(rest) * sample_rate)]
+    return head + rest
+
+
+def _ranges(pages: list[int]) -> list[tuple[int, int]]:
+    # Sorted 0-based pages -> inclusive 1-based (first, last) runs
+    runs = []
+    for p in pages:
+        if runs and runs[-1][1] == p:
+            runs[-1][1] = p + 1
+        else:
+            runs.append([p + 1, p + 1])
+    return [tuple(r) for r in runs]
+
+
+class QuickLook:
+    """
+    Page plan and deadline for one quick-look parse. A parser asks `pages()` for
+    each of its scan stages; stages share the time budget evenly.
+    """
+
+    def __init__(
+        self,
+        time_budget: float | None = None,
+        sample_rate: float | None = None,
+        priority_pages=(),
+        page_range: tuple[int, int] | None = None,
+        section: str | None = None
+    ):
+        if time_budget is None and sample_rate is None and page_range is None:
+            raise ValueError("A quick look needs a time budget, a sample rate or a page range")
+        if sample_rate is not None and not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be in (0, 1]")
+        self.time_budget = time_budget
+        self.sample_rate = sample_rate
+        self.priority = set(priority_pages)
+        self.page_range = page_range   # 0-based pages first..last-1 that stages are limited to
+        self.section = section         # outline title the range came from, if any
+        self.started = None
+        self.stages = {}   # stage -> (first, last, visited pages)
+
+    @classmethod
+    def for_source(
+        cls,
+        source,
+        time_budget: float | None = None,
+        sample_rate: float | None = None,
+        pages: tuple[int, int] | None = None,
+        section: str | None = None
+    ) -> "QuickLook | None":
+        """
+        A quick look prioritising the source's outline pages, or None for a full
+        parse. `pages` (1-based, inclusive) or `section` (a bookmark title, see
+        `section_pages`) limit it to part of the catalog; a section that is not
+        in the outline leaves nothing to scan.
+        """
+        if time_budget is None and sample_rate is None and pages is None and section is None:
+            return None
+        page_range, title = None, None
+        if pages is not None:
+            first, last = pages
+            if not 1 <= first <= last:
+                raise ValueError("pages must be a (first, last) range of 1-based page numbers")
+            page_range = (first - 1, last)
+        if section is not None:
+            found = section_pages(source, section)
+            title, first, last = found if found is not None else (None, 0, 0)
+            if page_range is not None:
+                first, last = max(first, page_range[0]), min(last, page_range[1])
+            page_range = (first, max(first, last))
+        return cls(time_budget, sample_rate, outline_pages(source), page_range, title)
+
+    def _deadline(self, stages_left: int) -> float | None:
+        if self.time_budget is None:
+            return None
+        now = time.monotonic()
+        remaining = self.started + self.time_budget - now
+        return now + max(0.0, remaining) / max(1, stages_left)
+
+    def pages(self, stage: str, first: int, last: int, stages_left: int = 1) -> Iterator[int]:
+        """
+        Pages of one scan stage in visit order, stopping at this stage's share of
+        the remaining budget. A page counts as visited once it has been handed out.
+        """
+        if self.started is None:
+            self.started = time.monotonic()
+        if self.page_range is not None:
+            first = max(first, self.page_range[0])
+            last = max(first, min(last, self.page_range[1]))
+        visited = set()
+        self.stages[stage] = (first, last, visited)
+        deadline = self._deadline(stages_left)
+        for page in plan_pages(first, last, self.priority, self.sample_rate):
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            visited.add(page)
+            yield page
+
+    def skipped(self, stage: str) -> list[tuple[int, int]]:
+        """Inclusive 1-based physical page ranges of `stage` that were never scanned."""
+        first, last, visited = self.stages[stage]
+        return _ranges([p for p in range(first, last) if p not in visited])
+
+    def summary(self) -> dict:
+        scanned = sum(len(v) for _, _, v in self.stages.values())
+        total = sum(last - first for first, last, _ in self.stages.values())
+        skipped = {stage: self.skipped(stage) for stage in self.stages}
+        summary = {
+            "complete": not any(skipped.values()),
+            "elapsed_s": round(time.monotonic() - self.started, 2) if self.started else 0.0,
+            "pages_scanned": scanned,
+            "pages_total": total,
+            "skipped": skipped,
+        }
+        if self.page_range is not None:
+            # What "complete" is relative to: inclusive 1-based pages, and the bookmark they came from
+            first, last = self.page_range
+            summary["range"] = (first + 1, last) if last > first else None
+            summary["section"] = self.section
+        return summary
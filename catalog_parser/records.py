@@ -0,0 +1,211 @@
+# catalog_parser/records.py
+'''
+Compact representation of parsed programs.
+
+`ProgramRecord` is a slotted, read-only mapping with the report columns as keys,
+so it can be used wherever a row dict was used before. `ProgramFrameBuilder`
+appends records straight into typed column arrays and turns them into a frame
+with categorical flags / labels and nullable integer counts. Every builder uses
+the same CategoricalDtype objects, so concatenating the graduate and
+undergraduate frames keeps the categoricals.
+'''
+from array import array
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+# Report column -> ProgramRecord attribute
+FIELDS = {
+    "Program Name": "name",
+    "Accredited": "accredited",
+    "Educational Objective": "educational_objective",
+    "Concentrations? Yes or No": "concentrations",
+    "Total Credit Hours in Program": "credit_hours",
+    "Program Length Measurement": "length_measurement",
+    "Full-Time Enrollment": "full_time_enrollment",
+    "Page Number": "page_number",
+    "License Prep": "license_prep",
+    "Modality": "modality",
+    "Type": "program_type",
+}
+
+# Column order of each parser's output
+GR_COLUMNS = tuple(FIELDS)
+UG_COLUMNS = (
+    "Program Name", "Accredited", "Type", "Concentrations? Yes or No", "Total Credit Hours in Program",
+    "Program Length Measurement", "Full-Time Enrollment", "Page Number", "Educational Objective",
+    "License Prep", "Modality",
+)
+
+# ---------- column types ----------
+
+YES_NO = pd.CategoricalDtype(["No", "Yes"])
+MODALITY = pd.CategoricalDtype(["Campus", "Hybrid", "Online"])
+PROGRAM_TYPE = pd.CategoricalDtype([
+    "Major", "Major with Concentration", "Concentration", "Minor", "Certificate", "Grad Cert", "Other", "Unknown",
+])
+EDUCATIONAL_OBJECTIVE = pd.CategoricalDtype(["Bachelor", "Masters", "Doctorate", "Certificate", "Grad Cert", "Other", "Unknown"])
+LENGTH_MEASUREMENT = pd.CategoricalDtype(["Semester"])
+INT = "Int64"
+
+# Column -> CategoricalDtype, INT, or None (plain strings)
+COLUMN_TYPES = {
+    "Program Name": None,
+    "Accredited": YES_NO,
+    "Educational Objective": EDUCATIONAL_OBJECTIVE,
+    "Concentrations? Yes or No": YES_NO,
+    "Total Credit Hours in Program": INT,
+    "Program Length Measurement": LENGTH_MEASUREMENT,
+    "Full-Time Enrollment": INT,
+    "Page Number": INT,
+    "License Prep": YES_NO,
+    "Modality": MODALITY,
+    "Type": PROGRAM_TYPE,
+}
+
+# ---------- record ----------
+
+class ProgramRecord(Mapping):
+    """
+    One report row. Behaves like a read-only dict keyed by column name (in the
+    producing parser's column order); `dict(record)` gives a plain row back.
+    """
+    __slots__ = ("columns",) + tuple(FIELDS.values())
+
+    def __init__(self, columns: tuple[str, ...] = GR_COLUMNS, **values):
+        self.columns = columns
+        for attr in FIELDS.values():
+            setattr(self, attr, values.pop(attr, None))
+        if values:
+            raise TypeError(f"Unknown ProgramRecord fields: {sorted(values)}")
+
+    @classmethod
+    def from_row(cls, row: Mapping) -> "ProgramRecord":
+        return cls(tuple(row), **{FIELDS[col]: value for col, value in row.items()})
+
+    def __getitem__(self, column: str):
+        if column not in self.columns:
+            raise KeyError(column)
+        return getattr(self, FIELDS[column])
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __repr__(self) -> str:
+        return f"ProgramRecord({dict(self)!r})"
+
+# ---------- columnar builder ----------
+
+class _CategoryColumn:
+    def __init__(self, dtype: pd.CategoricalDtype):
+        self.dtype = dtype
+        self.codes = array("b")
+        self.lookup = {value: code for code, value in enumerate(dtype.categories)}
+
+    def append(self, value) -> bool:
+        code = -1 if value is None else self.lookup.get(value)
+        if code is None:
+            return False
+        self.codes.append(code)
+        return True
+
+    def values(self) -> list:
+        categories = self.dtype.categories
+        return [None if code < 0 else categories[code] for code in self.codes]
+
+    def array(self):
+        return pd.Categorical.from_codes(np.frombuffer(self.codes, dtype=np.int8), dtype=self.dtype)
+
+
+class _IntColumn:
+    def __init__(self):
+        self.data = array("q")
+        self.mask = bytearray()   # 1 where the value is missing
+
+    def append(self, value) -> bool:
+        if value is None:
+            self.data.append(0)
+            self.mask.append(1)
+            return True
+        if isinstance(value, bool) or not isinstance(value, (int, np.integer)):
+            return False
+        self.data.append(int(value))
+        self.mask.append(0)
+        return True
+
+    def values(self) -> list:
+        return [None if missing else value for value, missing in zip(self.data, self.mask)]
+
+    def array(self):
+        return pd.arrays.IntegerArray(
+            np.frombuffer(self.data, dtype=np.int64).copy(),
+            np.frombuffer(self.mask, dtype=np.bool_).copy(),
+        )
+
+
+class _ObjectColumn:
+    def __init__(self, values: list | None = None):
+        self.data = values or []
+
+    def append(self, value) -> bool:
+        self.data.append(value)
+        return True
+
+    def values(self) -> list:
+        return self.data
+
+    def array(self):
+        return pd.array(self.data, dtype=object)
+
+
+def _column(kind):
+    if kind is None:
+        return _ObjectColumn()
+    if kind == INT:
+        return _IntColumn()
+    return _CategoryColumn(kind)
+
+
+class ProgramFrameBuilder:
+    """
+    Accumulate records (ProgramRecord or plain row dicts) column by column and
+    build a typed DataFrame. A value outside a column's declared type (a new
+    category label, a non-integer count) demotes just that column to objects,
+    so unexpected catalog text never breaks the report.
+    """
+
+    def __init__(self, columns: tuple[str, ...] = GR_COLUMNS):
+        self.columns = tuple(columns)
+        self._data = {col: _column(COLUMN_TYPES.get(col)) for col in self.columns}
+        self._rows = 0
+
+    def add(self, record: Mapping):
+        for col in self.columns:
+            value = record.get(col)
+            column = self._data[col]
+            if not column.append(value):
+                column = self._data[col] = _ObjectColumn(column.values())
+                column.append(value)
+        self._rows += 1
+
+    def extend(self, records) -> "ProgramFrameBuilder":
+        for record in records:
+            self.add(record)
+        return self
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({col: self._data[col].array() for col in self.columns})
+
+
+def records_frame(records, columns: tuple[str, ...] = GR_COLUMNS) -> pd.DataFrame:
+    """Typed frame for a list of records (or an already filled builder)."""
+    if isinstance(records, ProgramFrameBuilder):
+        return records.frame()
+    return ProgramFrameBuilder(columns).extend(records).frame()
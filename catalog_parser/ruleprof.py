@@ -0,0 +1,219 @@
+# catalog_parser/ruleprof.py
+'''
+Per-rule hit and cost profile of the parsers' ordered rule tables.
+
+    python -m catalog_parser.ruleprof catalog.pdf --parser gr [--save prof.json] [--baseline old.json]
+
+parses the catalog with profiling on and prints, for every rule of every
+instrumented table (the hour PrioritySearch tables, the minor hour patterns,
+the detectors' stop phrases, the degree suffixes):
+
+    checks       times its table was consulted
+    evaluated    times the rule runs in normal mode (ordered lists stop at the first hit)
+    matched      times it matched, out of `checks`
+    wins         times it decided the table's answer
+    total ms     time spent running it on its own, over every check
+
+While profiling, every rule is run (and timed) on every check, even past the
+first hit of an ordered table, so the answers are the same, only slower.
+A rule that never wins can be pruned or is shadowed by an earlier one; with
+`--baseline`, rules that are new or at least SLOWDOWN_FACTOR times slower
+per check than in the saved profile are flagged.
+
+The profile is process-wide, so only profile runs that nothing else is
+parsing alongside (the CLI, a notebook).
+'''
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE = None          # the active RuleProfile while `profiling()` runs
+SLOWDOWN_FACTOR = 2.0   # --baseline flags rules at least this much slower per check
+
+
+class RuleStats:
+    __slots__ = ("rule", "checks", "evaluations", "matches", "wins", "seconds")
+
+    def __init__(self, rule: str):
+        self.rule = rule
+        self.checks = self.evaluations = self.matches = self.wins = 0
+        self.seconds = 0.0
+
+
+class RuleProfile:
+    """Counters for every rule table consulted since it was created, keyed by table name."""
+
+    def __init__(self):
+        self.tables = {}   # table name -> [RuleStats] in rule order
+
+    def table(self, name: str, rules) -> list[RuleStats]:
+        stats = self.tables.get(name)
+        if stats is None:
+            stats = self.tables[name] = [RuleStats(str(rule)) for rule in rules]
+        return stats
+
+    def _run(self, stats: RuleStats, test, arg):
+        start = time.perf_counter()
+        result = test(arg)
+        stats.seconds += time.perf_counter() - start
+        stats.checks += 1
+        if result:
+            stats.matches += 1
+        return result
+
+    # ---------- table kinds ----------
+
+    def first(self, name: str, patterns, text: str, labels=None):
+        """(rule index, match) of the first pattern in order that finds something in `text`, or None."""
+        stats = self.table(name, labels if labels is not None else [p.pattern for p in patterns])
+        best = None
+        for idx, (pattern, rule) in enumerate(zip(patterns, stats)):
+            if best is None:
+                rule.evaluations += 1  # normal mode stops at the first hit
+            m = self._run(rule, pattern.search, text)
+            if m and best is None:
+                best = (idx, m)
+        if best is not None:
+            stats[best[0]].wins += 1
+        return best
+
+    def any_in(self, name: str, phrases, text: str) -> bool:
+        """`any(phrase in text for phrase in phrases)`; the first phrase found wins."""
+        stats = self.table(name, phrases)
+        won = None
+        for idx, (phrase, rule) in enumerate(zip(phrases, stats)):
+            if won is None:
+                rule.evaluations += 1  # any() stops at the first hit
+            if self._run(rule, text.__contains__, phrase) and won is None:
+                won = idx
+        if won is not None:
+            stats[won].wins += 1
+        return won is not None
+
+    def search_all(self, name: str, patterns, text: str) -> list:
+        """`[p.search(text) for p in patterns]`; the caller credits the winner with `win()`."""
+        stats = self.table(name, [p.pattern for p in patterns])
+        found = []
+        for pattern, rule in zip(patterns, stats):
+            rule.evaluations += 1
+            found.append(self._run(rule, pattern.search, text))
+        return found
+
+    def win(self, name: str, idx: int):
+        self.tables[name][idx].wins += 1
+
+    # ---------- report ----------
+
+    def rows(self) -> list[dict]:
+        rows = []
+        for name, stats in self.tables.items():
+            table_seconds = sum(s.seconds for s in stats) or 1.0
+            for order, s in enumerate(stats):
+                rows.append({
+                    "table": name,
+                    "order": order,
+                    "rule": s.rule,
+                    "checks": s.checks,
+                    "evaluated": s.evaluations,
+                    "matched": s.matches,
+                    "wins": s.wins,
+                    "total_ms": round(s.seconds * 1000, 3),
+                    "us_per_check": round(s.seconds / s.checks * 1e6, 2) if s.checks else 0.0,
+                    "share_pct": round(s.seconds / table_seconds * 100, 1),
+                })
+        return rows
+
+
+@contextmanager
+def profiling():
+    """Profile the rule tables consulted inside the block; yields the RuleProfile."""
+    global PROFILE
+    previous, PROFILE = PROFILE, RuleProfile()
+    try:
+        yield PROFILE
+    finally:
+        PROFILE = previous
+
+
+def win(name: str, idx: int):
+    """Credit rule `idx` of table `name` with a win, when profiling."""
+    if PROFILE is not None:
+        PROFILE.win(name, idx)
+
+# ---------- CLI ----------
+
+def _note(row: dict) -> str:
+    if not row["checks"]:
+        return "never consulted"
+    if not row["matched"]:
+        return "never matches"
+    if not row["wins"]:
+        return "never wins"
+    return ""
+
+def compare(rows: list[dict], baseline: list[dict], factor: float = SLOWDOWN_FACTOR) -> list[str]:
+    """Rules that are new since `baseline` or at least `factor` times slower per check."""
+    before = {(r["table"], r["rule"]): r for r in baseline}
+    warnings = []
+    for row in rows:
+        old = before.get((row["table"], row["rule"]))
+        if old is None:
+            warnings.append(f"new rule in {row['table']}: {row['rule']!r} ({row['us_per_check']} µs/check)")
+        elif old["us_per_check"] and row["us_per_check"] >= factor * old["us_per_check"]:
+            warnings.append(
+                f"slower rule in {row['table']}: {row['rule']!r} "
+                f"{old['us_per_check']} -> {row['us_per_check']} µs/check"
+            )
+    return warnings
+
+def print_report(rows: list[dict], width: int = 48):
+    table = None
+    for row in rows:
+        if row["table"] != table:
+            table = row["table"]
+            print(f"\n{table}")
+            print(f"  {'#':>3} {'rule':<{width}} {'checks':>7} {'evaluated':>9} {'matched':>8} {'wins':>6} "
+                  f"{'total ms':>9} {'µs/check':>9} {'share':>6}")
+        rule = row["rule"] if len(row["rule"]) <= width else row["rule"][:width - 1] + "…"
+        print(f"  {row['order']:>3} {rule:<{width}} {row['checks']:>7} {row['evaluated']:>9} {row['matched']:>8} "
+              f"{row['wins']:>6} {row['total_ms']:>9} {row['us_per_check']:>9} {row['share_pct']:>5}%  {_note(row)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m catalog_parser.ruleprof")
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--parser", choices=["gr", "ug"], action="append", default=[],
+                        help="parser for each PDF, in order (default gr)")
+    parser.add_argument("--save", help="write the profile rows as JSON")
+    parser.add_argument("--baseline", help="flag rules new or slower than in this saved profile")
+    args = parser.parse_args(argv)
+
+    from .gr_parser import run_gr_parser
+    from .ug_parser import run_ug_parser
+    runs = {"gr": run_gr_parser, "ug": run_ug_parser}
+    kinds = args.parser + ["gr"] * (len(args.pdfs) - len(args.parser))
+
+    with profiling() as profile:
+        for path, kind in zip(args.pdfs, kinds):
+            start = time.perf_counter()
+            df = runs[kind](path)
+            print(f"{os.path.basename(path)} ({kind}): {len(df)} programs in {time.perf_counter() - start:.2f} s")
+    rows = profile.rows()
+    print_report(rows)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(rows, indent=2))
+        print(f"\nprofile saved to {args.save}")
+    if args.baseline:
+        warnings = compare(rows, json.loads(Path(args.baseline).read_text()))
+        print()
+        print("\n".join(warnings) if warnings else f"no rule is new or {SLOWDOWN_FACTOR}x slower than the baseline")
+
+
+if __name__ == "__main__":
+    # Run the package's copy of this module: that is the one whose settings the parsers read
+    from .ruleprof import main
+    main()
@@ -0,0 +1,174 @@
+# catalog_parser/scheduler.py
+'''
+Process-wide admission control for catalog parses.
+
+Every Streamlit session in the server shares one scheduler. At most
+`MAX_CONCURRENT_PARSES` jobs run at a time; the rest wait in a FIFO queue and
+can report their position. Submitting a job whose key (PDF hashes + parser
+version) is already queued or running attaches to that job instead of
+starting another parse, so N sessions asking for the same catalogs wait on one.
+A running job that everyone left keeps its key until it has actually stopped;
+submitting the key again meanwhile queues a new job that starts only after it.
+'''
+import os
+import threading
+from collections import deque
+from typing import Callable
+
+MAX_CONCURRENT_PARSES = int(os.environ.get("OVS_MAX_CONCURRENT_PARSES", "2"))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """
+    A unit of work shared by every session that submitted the same key.
+    The job function receives the job and reports progress with `publish`.
+    """
+
+    def __init__(self, key, fn: Callable[["Job"], object]):
+        self.key = key
+        self.fn = fn
+        self.state = QUEUED
+        self.records = []   # progress items published so far (append-only)
+        self.result = None
+        self.error = None
+        self.waiters = 1
+        self.after = None   # job on the same key that must finish before this one starts
+        self._done = threading.Event()
+        self._cancel = threading.Event()
+
+    # ---------- used by the job function ----------
+
+    def publish(self, item):
+        self.records.append(item)
+
+    def check_cancelled(self):
+        """Raise JobCancelled once every waiter has gone; call between units of work."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    # ---------- used by waiters ----------
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def outcome(self):
+        """Result of a finished job; re-raises the job's error."""
+        self.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class ParseScheduler:
+    def __init__(self, limit: int = MAX_CONCURRENT_PARSES):
+        self.limit = max(1, limit)
+        self._queue = deque()
+        self._inflight = {}   # key -> Job (queued or running)
+        self._running = 0
+        self._workers = 0
+        self._cond = threading.Condition()
+
+    def submit(self, key, fn: Callable[[Job], object]) -> Job:
+        with self._cond:
+            previous = self._inflight.get(key)
+            if previous is not None and not previous.cancel_requested():
+                previous.waiters += 1
+                return previous
+            job = Job(key, fn)
+            # A job still stopping on this key would share its checkpoint; wait for it
+            job.after = previous
+            self._inflight[key] = job
+            self._queue.append(job)
+            if self._workers < self.limit:
+                self._workers += 1
+                threading.Thread(target=self._worker, name=f"parse-worker-{self._workers}", daemon=True).start()
+            self._cond.notify()
+            return job
+
+    def position(self, job: Job) -> int:
+        """1-based place in the queue, or 0 once the job has started."""
+        with self._cond:
+            try:
+                return self._queue.index(job) + 1
+            except ValueError:
+                return 0
+
+    def release(self, job: Job):
+        """
+        A waiter gave up. The job is dropped (queued) or asked to stop (running)
+        only when nobody else is waiting on it. A running job keeps its key
+        until it has stopped (see `submit`).
+        """
+        with self._cond:
+            job.waiters -= 1
+            if job.waiters > 0 or job.done():
+                return
+            if job in self._queue:
+                self._queue.remove(job)
+                if self._inflight.get(job.key) is job:
+                    # Whatever it was waiting for is still the key's job
+                    if job.after is not None and not job.after.done():
+                        self._inflight[job.key] = job.after
+                    else:
+                        del self._inflight[job.key]
+                self._finish(job, CANCELLED)
+            else:
+                job._cancel.set()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"limit": self.limit, "running": self._running, "queued": len(self._queue)}
+
+    # ---------- workers ----------
+
+    def _finish(self, job: Job, state: str):
+        job.state = state
+        job._done.set()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                job = self._queue.popleft()
+                job.state = RUNNING
+                self._running += 1
+            if job.after is not None:
+                job.after.wait()  # the previous job on this key is stopping; it holds the other slot
+                job.after = None
+            state = DONE
+            try:
+                job.result = job.fn(job)
+            except JobCancelled:
+                state = CANCELLED
+            except Exception as exc:
+                job.error, state = exc, FAILED
+            with self._cond:
+                self._running -= 1
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+                self._finish(job, state)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> ParseScheduler:
+    """The process-wide scheduler (created on first use)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ParseScheduler()
+        return _scheduler
@@ -0,0 +1,254 @@
+# catalog_parser/source.py
+'''
+In-memory PDF sources shared by PyPDF2, pdfplumber and worker processes.
+
+An upload is held once (as `bytes`, or memory-mapped when it already lives on
+disk) and every reader gets its own cheap stream over that same buffer, so
+nothing is written to disk and re-read just to be parsed. Worker processes
+never receive the bytes: a source is pickled as its path and mapped again on
+the other side, and an upload that only lives in memory is first spooled to a
+temporary file (once) that the server then maps too, so every process shares
+the one copy in the OS page cache.
+'''
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20  # 1 MiB per write when persisting
+
+
+class PdfSource:
+    """
+    One shared copy of a PDF's bytes.
+    """
+
+    def __init__(self, data, name: str = "", path: Path | None = None):
+        # bytearray / memoryview are frozen once so BytesIO can share the buffer
+        if isinstance(data, (bytearray, memoryview)):
+            data = bytes(data)
+        self.data = data
+        self.name = name
+        self.path = path
+        self._digest = None
+        self._reader = None
+        self._extractor = None
+
+    @classmethod
+    def from_path(cls, path, name: str | None = None) -> "PdfSource":
+        """Memory-map a PDF on disk (read-only, shares the OS page cache)."""
+        path = Path(path)
+        return cls(_map(path), name=path.name if name is None else name, path=path)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __reduce__(self):
+        # Re-mapped in the worker instead of copied through the pipe
+        if self.path is None:
+            self._spool()
+        return (PdfSource.from_path, (self.path, self.name))
+
+    def _spool(self):
+        # Write an in-memory upload to a temporary file once and map it from then
+        # on; the file goes away with this source
+        with _spool_lock:
+            if self.path is not None:
+                return
+            fd, tmp = tempfile.mkstemp(prefix="catalog-", suffix=".pdf")
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.data)
+            weakref.finalize(self, _unlink, tmp)
+            # Readers already open keep the bytes they stream from
+            self.path, self.data = Path(tmp), _map(Path(tmp))
+
+    @property
+    def sha256(self) -> str:
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.data).hexdigest()
+        return self._digest
+
+    def stream(self):
+        """
+        A new independent read stream over the shared buffer.
+        """
+        if isinstance(self.data, mmap.mmap):
+            return _MmapStream(self.data)
+        return io.BytesIO(self.data)  # BytesIO shares an immutable bytes object without copying
+
+    def reader(self):
+        """PyPDF2 reader over the buffer (created once, reused by every pass)."""
+        if self._reader is None:
+            from PyPDF2 import PdfReader
+            self._reader = PdfReader(self.stream())
+        return self._reader
+
+    def extractor(self):
+        """Cached page-text cascade (see catalog_parser.backends) shared by every pass."""
+        if self._extractor is None:
+            from .backends import TEXT_CACHE, CascadeExtractor, available_backends, text_cache_path
+            backends = available_backends()
+            cache_path = text_cache_path(self, backends) if TEXT_CACHE else None
+            self._extractor = CascadeExtractor(self, backends, cache_path=cache_path)
+        return self._extractor
+
+    def close(self):
+        """Release the extractor's backend handles and page cache."""
+        if self._extractor is not None:
+            self._extractor.close()
+            self._extractor = None
+
+    def plumber(self):
+        """pdfplumber document over the buffer; use as a context manager."""
+        import pdfplumber
+        return pdfplumber.open(self.stream())
+
+    def persist(self, path, chunk_size: int = CHUNK_SIZE, background: bool = True):
+        """
+        Write the buffer to disk in chunks. Runs on a daemon thread by default so
+        parsing never waits on the disk; the thread is returned for callers that
+        want to join it. A failed write leaves no partial file, sets the
+        thread's `error` and is reported on stderr like any uncaught thread error.
+        """
+        path = Path(path)
+
+        def _write():
+            view = memoryview(self.data)
+            tmp = path.with_suffix(path.suffix + ".part")
+            try:
+                with open(tmp, "wb") as f:
+                    for start in range(0, len(view), chunk_size):
+                        f.write(view[start:start + chunk_size])
+                tmp.replace(path)
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+
+        if not background:
+            _write()
+            return None
+        thread = _PersistThread(_write, name=f"persist-{path.name}")
+        thread.start()
+        return thread
+
+
+class _PersistThread(threading.Thread):
+    """Daemon thread running `persist`'s write; `error` holds the exception it died with, if any."""
+
+    def __init__(self, write, name: str):
+        super().__init__(name=name, daemon=True)
+        self._write = write
+        self.error = None
+
+    def run(self):
+        try:
+            self._write()
+        except BaseException as exc:
+            self.error = exc
+            raise  # threading.excepthook reports it on stderr
+
+
+_spool_lock = threading.Lock()
+
+def _map(path: Path):
+    with open(path, "rb") as f:
+        # An empty file cannot be mapped; leave it to the PDF readers to reject
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass  # already gone, or still mapped on Windows
+
+
+class LazyPlumber:
+    """
+    Opens the pdfplumber document on first use and keeps it open for the rest
+    of the pass, so a fallback used on many pages only parses the file once.
+    """
+
+    def __init__(self, source: PdfSource):
+        self.source = source
+        self._pdf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def page(self, index: int):
+        if self._pdf is None:
+            self._pdf = self.source.plumber()
+        return self._pdf.pages[index]
+
+
+class _MmapStream(io.RawIOBase):
+    """
+    Seekable read-only stream over a shared mmap with its own position.
+    """
+
+    def __init__(self, buffer: mmap.mmap):
+        self._view = memoryview(buffer)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        self._pos = max(self._pos, 0)
+        return self._pos
+
+    def readinto(self, b) -> int:
+        chunk = self._view[self._pos:self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else self._pos + size
+        chunk = bytes(self._view[self._pos:end])
+        self._pos += len(chunk)
+        return chunk
+
+
+def as_source(obj) -> PdfSource:
+    """
+    Accept a PdfSource, a path, a bytes-like object, an mmap or an uploaded
+    file (anything with `getvalue()` / `read()`) and return a PdfSource.
+    """
+    if isinstance(obj, PdfSource):
+        return obj
+    if isinstance(obj, (str, Path)):
+        return PdfSource.from_path(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview, mmap.mmap)):
+        return PdfSource(obj)
+    name = getattr(obj, "name", "")
+    if hasattr(obj, "getvalue"):  # Streamlit UploadedFile / BytesIO
+        return PdfSource(obj.getvalue(), name=name)
+    return PdfSource(obj.read(), name=name)
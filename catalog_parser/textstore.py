@@ -0,0 +1,257 @@
+# catalog_parser/textstore.py
+'''
+Compact storage for a catalog's extracted text.
+
+Page text lives in a few large strings instead of one string per page plus a
+list of line strings. Pages are appended as they are extracted and adjacent
+buffers are merged geometrically (like a binary counter), so a catalog ends up
+in O(log pages) buffers and `compact()` folds them into one. Page and line
+boundaries are kept in `array` offset tables; readers get a `PageView` and scan
+it with regex `pos` / `endpos` or lazy line iteration instead of slicing the
+page into a list.
+
+    store.save(path) / TextStore.load(path)
+
+persist the buffer and tables so a catalog is only extracted once.
+'''
+import json
+import re
+from array import array
+from pathlib import Path
+from typing import Iterator
+
+# The boundaries str.splitlines() breaks on
+LINE_BREAK = re.compile("\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+PAGE_SEPARATOR = "\n"   # between pages in a buffer, so a run of pages reads like "\n".join(pages)
+FORMAT_VERSION = 1
+
+
+class PageView:
+    """
+    One page inside a store buffer. Nothing is copied until `text`, `line()` or
+    the line iterators are asked for a string.
+    """
+    __slots__ = ("buf", "start", "end", "_line_start", "_line_end", "line_lo", "line_hi")
+
+    def __init__(self, buf: str, start: int, end: int, line_start: array, line_end: array, line_lo: int, line_hi: int):
+        self.buf = buf
+        self.start = start
+        self.end = end
+        self._line_start = line_start
+        self._line_end = line_end
+        self.line_lo = line_lo
+        self.line_hi = line_hi
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @property
+    def text(self) -> str:
+        return self.buf[self.start:self.end]
+
+    @property
+    def line_count(self) -> int:
+        return self.line_hi - self.line_lo
+
+    def line_span(self, k: int) -> tuple[int, int]:
+        """(pos, endpos) of line k in `buf`, as in `text.splitlines()[k]`; negative k counts from the end."""
+        n = self.line_hi - self.line_lo
+        if k < 0:
+            k += n
+        if not 0 <= k < n:
+            raise IndexError(k)
+        return self.start + self._line_start[self.line_lo + k], self.start + self._line_end[self.line_lo + k]
+
+    def line(self, k: int) -> str:
+        pos, endpos = self.line_span(k)
+        return self.buf[pos:endpos]
+
+    def iter_lines(self, start: int | None = None, stop: int | None = None, reverse: bool = False) -> Iterator[str]:
+        """Lines of `text.splitlines()[start:stop]`, one string at a time."""
+        indices = range(*slice(start, stop).indices(self.line_hi - self.line_lo))
+        buf, starts, ends, base, offset = self.buf, self._line_start, self._line_end, self.line_lo, self.start
+        for k in (reversed(indices) if reverse else indices):
+            yield buf[offset + starts[base + k]:offset + ends[base + k]]
+
+    def iter_split_reversed(self, sep: str = "\n") -> Iterator[str]:
+        """Pieces of `text.split(sep)`, last first, found with rfind instead of a split list."""
+        buf, end = self.buf, self.end
+        while True:
+            cut = buf.rfind(sep, self.start, end)
+            if cut < 0:
+                yield buf[self.start:end]
+                return
+            yield buf[cut + len(sep):end]
+            end = cut
+
+    def search(self, pattern: re.Pattern, line_start: int = 0, line_stop: int | None = None):
+        """`pattern.search` over the page (or a range of its lines) without slicing it out."""
+        if line_start == 0 and line_stop is None:
+            return pattern.search(self.buf, self.start, self.end)
+        indices = range(*slice(line_start, line_stop).indices(self.line_hi - self.line_lo))
+        if not indices:
+            return None
+        pos = self.start + self._line_start[self.line_lo + indices[0]]
+        endpos = self.start + self._line_end[self.line_lo + indices[-1]]
+        return pattern.search(self.buf, pos, endpos)
+
+    def fullmatch_line(self, pattern: re.Pattern, k: int):
+        pos, endpos = self.line_span(k)
+        return pattern.fullmatch(self.buf, pos, endpos)
+
+
+class TextStore:
+    """
+    Text of up to `page_count` pages, added in any order.
+    """
+
+    def __init__(self, page_count: int):
+        self.page_count = page_count
+        self._buffers = []                 # merged page texts, largest first
+        self._buffer_ranges = []           # per buffer: (first, last) positions in _order
+        self._order = array("q")           # page indices in insertion order
+        self._page_buffer = array("q", [-1]) * page_count
+        self._page_start = array("q", [0]) * page_count
+        self._page_end = array("q", [0]) * page_count
+        self._page_line_lo = array("q", [0]) * page_count
+        self._page_line_hi = array("q", [0]) * page_count
+        self._line_start = array("q")     # per line, in insertion order; offsets from the page start
+        self._line_end = array("q")
+
+    def __contains__(self, index: int) -> bool:
+        return 0 <= index < self.page_count and self._page_buffer[index] >= 0
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def buffer_count(self) -> int:
+        return len(self._buffers)
+
+    # ---------- adding pages ----------
+
+    def add(self, index: int, text: str):
+        if index in self:
+            return
+        line_lo = len(self._line_start)
+        pos = 0
+        for m in LINE_BREAK.finditer(text):
+            self._line_start.append(pos)
+            self._line_end.append(m.start())
+            pos = m.end()
+        if pos < len(text):  # splitlines() drops the empty piece after a final line break
+            self._line_start.append(pos)
+            self._line_end.append(len(text))
+
+        self._buffers.append(text)
+        self._buffer_ranges.append((len(self._order), len(self._order) + 1))
+        self._order.append(index)
+        self._page_buffer[index] = len(self._buffers) - 1
+        self._page_start[index] = 0
+        self._page_end[index] = len(text)
+        self._page_line_lo[index] = line_lo
+        self._page_line_hi[index] = len(self._line_start)
+        # Keep buffer sizes at least doubling towards the bottom: each character is
+        # copied O(log pages) times in total and only O(log pages) buffers exist
+        while len(self._buffers) >= 2 and len(self._buffers[-2]) <= 2 * len(self._buffers[-1]):
+            self._merge_top()
+
+    def _merge_top(self):
+        top = self._buffers.pop()
+        first, last = self._buffer_ranges.pop()
+        below = len(self._buffers) - 1
+        delta = len(self._buffers[below]) + len(PAGE_SEPARATOR)
+        self._buffers[below] = self._buffers[below] + PAGE_SEPARATOR + top
+        self._buffer_ranges[below] = (self._buffer_ranges[below][0], last)
+
+        for p in self._order[first:last]:
+            self._page_buffer[p] = below
+            self._page_start[p] += delta
+            self._page_end[p] += delta
+        # Line offsets are page-relative, so they never move (and views taken
+        # before a merge keep pointing into their old buffer correctly)
+
+    def compact(self):
+        """Fold every buffer into one."""
+        while len(self._buffers) >= 2:
+            self._merge_top()
+
+    # ---------- reading ----------
+
+    def page(self, index: int) -> PageView:
+        if index not in self:
+            raise KeyError(f"page {index} has not been added")
+        return PageView(
+            self._buffers[self._page_buffer[index]],
+            self._page_start[index], self._page_end[index],
+            self._line_start, self._line_end,
+            self._page_line_lo[index], self._page_line_hi[index],
+        )
+
+    def page_text(self, index: int) -> str:
+        return self.page(index).text
+
+    def span_text(self, pages) -> str:
+        """
+        `"\\n".join(page texts)` for the given pages. Pages that sit next to each
+        other in one buffer (the usual case for a sequential scan) come back as a
+        single slice.
+        """
+        pages = [p for p in pages if p in self]
+        if not pages:
+            return ""
+        first = self.page(pages[0])
+        end = first.end
+        for prev, p in zip(pages, pages[1:]):
+            if (
+                self._page_buffer[p] != self._page_buffer[prev]
+                or self._page_start[p] != self._page_end[prev] + len(PAGE_SEPARATOR)
+            ):
+                return PAGE_SEPARATOR.join(self.page_text(q) for q in pages)
+            end = self._page_end[p]
+        return first.buf[first.start:end]
+
+    # ---------- persistence ----------
+
+    _TABLES = ("_order", "_page_buffer", "_page_start", "_page_end", "_page_line_lo", "_page_line_hi", "_line_start", "_line_end")
+
+    def save(self, path):
+        """Write the (compacted) store: a JSON header line, the offset tables, then the UTF-8 text."""
+        self.compact()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = (self._buffers[0] if self._buffers else "").encode("utf-8")
+        header = {
+            "format": FORMAT_VERSION,
+            "page_count": self.page_count,
+            "tables": {name: len(getattr(self, name)) for name in self._TABLES},
+            "text_bytes": len(text),
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            for name in self._TABLES:
+                f.write(getattr(self, name).tobytes())
+            f.write(text)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path) -> "TextStore | None":
+        """The store saved at `path`, or None if it is missing or unreadable."""
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("format") != FORMAT_VERSION:
+                    return None
+                store = cls(header["page_count"])
+                for name in cls._TABLES:
+                    table = array("q")
+                    table.frombytes(f.read(header["tables"][name] * table.itemsize))
+                    setattr(store, name, table)
+                text = f.read(header["text_bytes"]).decode("utf-8")
+        except (OSError, ValueError, KeyError):
+            return None
+        if len(store._order):
+            store._buffers = [text]
+            store._buffer_ranges = [(0, len(store._order))]
+        return store
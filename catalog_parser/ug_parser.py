@@ -1,25 +1,34 @@
 # parser/ug_parser.py
+from itertools import islice
 from pathlib import Path
-from PyPDF2 import PdfReader
 import pandas as pd
 import re
-from openpyxl.utils import get_column_letter
-from openpyxl import load_workbook
+from typing import Callable, Iterator
+from . import ruleprof
+from .enrich import PrioritySearch, ProgramWindow, as_window
+from .checkpoint import Checkpoint
+from .prefilter import page_prefilter
+from .quicklook import QuickLook
+from .records import UG_COLUMNS, ProgramFrameBuilder, ProgramRecord
+from .scheduler import JobCancelled
+from .source import PdfSource, as_source
+from .textstore import PageView
+
+ACCREDITATION_KEYWORDS = [
+    "not accredited", "no accreditation", "accreditation is not required",
+    "not eligible for accreditation", "does not hold accreditation", "unaccredited"
+]
 
 def is_accredited(lines: list) -> str:
-    text = " ".join(lines).lower()
-    keywords = [
-        "not accredited", "no accreditation", "accreditation is not required",
-        "not eligible for accreditation", "does not hold accreditation", "unaccredited"
-    ]
-    return "No" if any(k in text for k in keywords) else "Yes"
+    return "No" if as_window(lines).contains_any(ACCREDITATION_KEYWORDS, joined=True) else "Yes"
 
 # def get_program_pid(formatted_title: str, pid_df: pd.DataFrame) -> str:
 #     match = pid_df[pid_df["Program"].str.lower().str.strip() == formatted_title.lower().strip()]
 #     return match.iloc[0]["PID"] if not match.empty else ""
 
-def extract_catalog_page_number(lines: list) -> int:
-    for line in reversed(lines):
+def extract_catalog_page_number(lines: list | PageView) -> int:
+    # A PageView is scanned from the end in place instead of being split into a list
+    for line in (lines.iter_split_reversed() if isinstance(lines, PageView) else reversed(lines)):
         if line.strip().isdigit() and len(line.strip()) >= 3:
             return int(line.strip())
     return None
@@ -35,9 +44,24 @@ def format_program_name(name: str) -> str:
         title_cased = re.sub(rf"\b{wrong}\b", right, title_cased)
     return title_cased
 
+FULLY_ONLINE = re.compile(r"(fully|100%)\s+online")
+# Case-insensitive superset of the `"UNDERGRADUATE CATALOG" in line.upper()` header test
+UNDERGRADUATE_CATALOG = re.compile("undergraduate catalog", re.IGNORECASE)
+# A title page shows the running header and a program suffix in its raw content
+# streams (whitespace and non-ASCII dropped, see catalog_parser.prefilter)
+UG_PREFILTER = [(
+    re.compile(rb"universityofsouthflorida", re.IGNORECASE),
+    re.compile(rb"undergraduatecatalog", re.IGNORECASE),
+    re.compile(rb"B\.S\.|B\.A\.|MINOR|CERTIFICATE|CONCENTRATION", re.IGNORECASE),
+)]
+
 def extract_modality_from_lines(lines: list) -> str:
-    text = " ".join(lines).lower()
-    if re.search(r"(fully|100%)\s+online", text) or any(k in text for k in ["offered online", "delivered online", "available online", "online format"]):
+    window = as_window(lines)
+    # Every answer other than the "Campus" default needs one of these words
+    if not window.contains_any(["online", "hybrid", "blended"]):
+        return "Campus"
+    text = window.joined
+    if FULLY_ONLINE.search(text) or any(k in text for k in ["offered online", "delivered online", "available online", "online format"]):
         return "Online"
     if any(k in text for k in ["hybrid", "blended", "online and on campus"]):
         return "Hybrid"
@@ -49,70 +73,94 @@ def extract_modality_from_lines(lines: list) -> str:
         return "Campus"
     return "Campus"
 
+LICENSE_KEYWORDS = [
+    "state-approved program", "leads to certification", "eligible for teacher certification",
+    "teacher preparation program", "florida teacher certification exam", "eligible for the endorsements"
+]
+
 def has_license_prep(lines: list) -> str:
-    text = " ".join(lines).lower()
-    keywords = [
-        "state-approved program", "leads to certification", "eligible for teacher certification",
-        "teacher preparation program", "florida teacher certification exam", "eligible for the endorsements"
+    return "Yes" if as_window(lines).contains_any(LICENSE_KEYWORDS, joined=True) else "No"
+
+# Per-line rule tables (patterns are written against upper-cased lines)
+MAJOR_HOUR_RULES = PrioritySearch([
+    r"TOTAL\s+(DEGREE|MAJOR|CERTIFICATE)\s+HOURS\s*:\s*(\d+)",
+    r"TOTAL\s+HOURS\s*:\s*(\d+)"
+], name="ug.MAJOR_HOUR_RULES")
+
+CERTIFICATE_HOUR_RULES = PrioritySearch([
+    r"TOTAL\s+CERTIFICATE\s+HOURS\s*[:\-]?\s*(\d+)",
+    r"CERTIFICATE\s+CORE\s*\((\d+)\s+CREDIT\s+HOURS\)",
+    r"CERTIFICATE\s+CORE\s+COURSES\s*\((\d+)\s+CREDIT\s+HOURS\)",
+    r"CERTIFICATE\s+REQUIREMENTS\s*[:\-]?\s*(\d+)\s+CREDIT\s+HOURS",
+    r"(\d+)\s+CREDIT\s+HOURS\s+REQUIRED"
+], name="ug.CERTIFICATE_HOUR_RULES")
+
+MINOR_HOUR_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in [
+        r"TOTAL\s+MINOR\s+(?:CREDIT\s+)?HOURS\s*[:\-]?\s*(\d+)",
+        r"REQUIRES\s+A\s+TOTAL\s+OF\s+(\d+)\s+CREDIT\s+HOURS",
+        r"COMPLETION\s+OF\s+THE\s+MINOR\s+REQUIRES\s+(\d+)\s+CREDIT\s+HOURS",
+        r"CONSISTS\s+OF\s+A\s+MINIMUM\s+OF\s+(\d+)\s+CREDIT\s+HOURS",
+        r"MINOR\s+(?:CORE|REQUIRED|ELECTIVE)?\s*(?:COURSES)?\s*\((\d+)\s+CREDIT\s+HOURS\)"
     ]
-    return "Yes" if any(k in text for k in keywords) else "No"
+]
 
-def extract_credit_hours_from_line(line: str) -> int:
-    patterns = [
-        r"TOTAL\s+(DEGREE|MAJOR|CERTIFICATE)\s+HOURS\s*:\s*(\d+)",
-        r"TOTAL\s+HOURS\s*:\s*(\d+)"
+MINOR_COMPONENT_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in [
+        r"MINOR\s+CORE\s+CREDIT\s+HOURS\s*[:\-]?\s*(\d+)",
+        r"MINOR\s+ELECTIVE\s+CREDIT\s+HOURS\s*[:\-]?\s*(\d+)"
     ]
-    for pattern in patterns:
-        match = re.search(pattern, line.upper())
-        if match:
-            return int(match.group(match.lastindex))
-    return None
+]
+
+def extract_credit_hours_from_line(line: str) -> int:
+    hit = MAJOR_HOUR_RULES.first(line.upper())
+    # The hour count is always the last group of the winning rule
+    return int(hit[1][-1]) if hit else None
 
 def extract_major_credit_hours(lines: list) -> int:
-    return next((extract_credit_hours_from_line(line) for line in lines if extract_credit_hours_from_line(line)), None)
+    for line in as_window(lines).upper_lines:
+        hit = MAJOR_HOUR_RULES.first(line)
+        if hit and int(hit[1][-1]):
+            return int(hit[1][-1])
+    return None
 
 extract_concentration_credit_hours = extract_major_credit_hours
 
 def extract_certificate_credit_hours(lines: list) -> int:
-    patterns = [
-        r"TOTAL\s+CERTIFICATE\s+HOURS\s*[:\-]?\s*(\d+)",
-        r"CERTIFICATE\s+CORE\s*\((\d+)\s+CREDIT\s+HOURS\)",
-        r"CERTIFICATE\s+CORE\s+COURSES\s*\((\d+)\s+CREDIT\s+HOURS\)",
-        r"CERTIFICATE\s+REQUIREMENTS\s*[:\-]?\s*(\d+)\s+CREDIT\s+HOURS",
-        r"(\d+)\s+CREDIT\s+HOURS\s+REQUIRED"
-    ]
-    for line in lines:
-        for pattern in patterns:
-            match = re.search(pattern, line.upper())
-            if match:
-                return int(match.group(1))
+    for line in as_window(lines).upper_lines:
+        hit = CERTIFICATE_HOUR_RULES.first(line)
+        if hit:
+            return int(hit[1][0])
     return None
 
+def _search_each(name: str, patterns: list, line: str) -> list:
+    # Every pattern's match on the line, through the rule profile when it is on
+    if ruleprof.PROFILE is not None:
+        return ruleprof.PROFILE.search_all(name, patterns, line)
+    return [p.search(line) for p in patterns]
+
 def extract_minor_credit_hours(lines: list) -> int:
-    patterns = [
-        r"TOTAL\s+MINOR\s+(?:CREDIT\s+)?HOURS\s*[:\-]?\s*(\d+)",
-        r"REQUIRES\s+A\s+TOTAL\s+OF\s+(\d+)\s+CREDIT\s+HOURS",
-        r"COMPLETION\s+OF\s+THE\s+MINOR\s+REQUIRES\s+(\d+)\s+CREDIT\s+HOURS",
-        r"CONSISTS\s+OF\s+A\s+MINIMUM\s+OF\s+(\d+)\s+CREDIT\s+HOURS",
-        r"MINOR\s+(?:CORE|REQUIRED|ELECTIVE)?\s*(?:COURSES)?\s*\((\d+)\s+CREDIT\s+HOURS\)"
+    lines = as_window(lines).lines
+    hits = [
+        (idx, int(m.group(1)))
+        for line in lines
+        for idx, m in enumerate(_search_each("ug.MINOR_HOUR_PATTERNS", MINOR_HOUR_PATTERNS, line)) if m
     ]
-    values = {int(m.group(1)) for line in lines for p in patterns if (m := re.search(p, line, flags=re.IGNORECASE))}
-    if values: return max(values)
+    if hits:
+        best = max(value for _, value in hits)
+        ruleprof.win("ug.MINOR_HOUR_PATTERNS", next(idx for idx, value in hits if value == best))
+        return best
 
     total = 0
     seen = set()
-    component_patterns = [
-        r"MINOR\s+CORE\s+CREDIT\s+HOURS\s*[:\-]?\s*(\d+)",
-        r"MINOR\s+ELECTIVE\s+CREDIT\s+HOURS\s*[:\-]?\s*(\d+)"
-    ]
     for line in lines:
-        for pattern in component_patterns:
-            match = re.search(pattern, line, flags=re.IGNORECASE)
+        for idx, match in enumerate(_search_each("ug.MINOR_COMPONENT_PATTERNS", MINOR_COMPONENT_PATTERNS, line)):
             if match:
                 value = int(match.group(1))
                 if (line, value) not in seen:
                     seen.add((line, value))
                     total += value
+                    ruleprof.win("ug.MINOR_COMPONENT_PATTERNS", idx)  # every counted component is used
     return total or None
 
 def is_valid_program_name(line: str) -> bool:
@@ -125,6 +173,13 @@ def is_valid_program_name(line: str) -> bool:
     upper = line.upper()
     return not any(upper.startswith(p) for p in invalid_prefixes) and any(s in upper for s in suffixes)
 
+def _nonblank_lines(page: PageView, start: int = 0) -> Iterator[str]:
+    # Stripped non-empty lines from line `start` on, read out of the store one at a time
+    for line in page.iter_lines(start):
+        line = line.strip()
+        if line:
+            yield line
+
 def classify_program_type(name: str) -> str:
     upper = name.upper()
     if "MINOR" in upper: return "Minor"
@@ -133,77 +188,120 @@ def classify_program_type(name: str) -> str:
     if "B.A." in upper or "B.S." in upper: return "Major"
     return "Unknown"
 
-def extract_program_names(pdf_path: Path) -> list:
-    reader = PdfReader(pdf_path)
-    results = []
-
-    for i, page in enumerate(reader.pages):
-        text = page.extract_text()
-        if not text:
-            continue
-
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        page_num = extract_catalog_page_number(lines)
-        if not page_num or page_num <= 145:
-            continue
-
-        for j, line in enumerate(lines):
-            if "UNIVERSITY OF SOUTH FLORIDA" in line.upper() and "UNDERGRADUATE CATALOG" in line.upper():
-                title_lines = []
-                for k in range(j + 1, len(lines)):
-                    next_line = lines[k]
-                    if not next_line or re.search(r"[a-z]", next_line): break
-                    if "TOTAL DEGREE HOURS" in next_line.upper(): break
-                    title_lines.append(next_line)
-
-                full_title = " ".join(title_lines)
-                if full_title and is_valid_program_name(full_title):
-                    name = format_program_name(full_title)
-                    name = re.sub(r"^\d+\s+", "", name)
-                    name = re.sub(r"\s*Total\s+(Minor|Major|Certificate)?\s*Hours:\s*\d+", "", name, flags=re.IGNORECASE)
-                    name = re.sub(r"\s*Minor Requirements$", "", name, flags=re.IGNORECASE)
-                    name = re.sub(r"\(\s*\d+\s+Credit\s+Hours\s*\)", "", name, flags=re.IGNORECASE)
-                    name = re.sub(r"\s*-\s*\d+\s*$", "", name).strip()
-
-                    if any(x in name.upper() for x in [
-                        "STATE MANDATED", "ADDITIONAL INFORMATION", "PROGRESSION REQUIREMENTS",
-                        "ADVISING INFORMATION", "STATE MATHEMATICS PATHWAY", "RESEARCH OPPORTUNITIES",
-                        "TRAINING OPTION HTTPS", "TWO SPC", "CREDIT HOURS CONCENTRATION",
-                        "CONCENTRATION CORE", "ELECTIVE COURSES", "MINOR MINOR", "CONCENTRATION CORE COURSE",
-                        "INTERNSHIP OPPORTUNITIES", "RESPONSIBLE AND INCLUSIVE", "CONCENTRATION REQUIREMENT"
-                    ]):
-                        continue
-
-                    program_type = classify_program_type(name)
-                    block = lines[j+1 : j+75]
-                    credit = {
-                        "Major": extract_major_credit_hours,
-                        "Concentration": extract_concentration_credit_hours,
-                        "Certificate": extract_certificate_credit_hours,
-                        "Minor": extract_minor_credit_hours
-                    }.get(program_type, lambda _: None)(block)
-
-                    edu = {"Major": "Bachelor", "Minor": "Bachelor", "Concentration": "Bachelor", "Certificate": "Certificate"}.get(program_type, "Unknown")
-                    modality = extract_modality_from_lines(lines[j+1 : j+20])
-                    license_prep = has_license_prep(block)
-                    accredited = is_accredited(block)
-
-                    results.append({
-                        # "PID": "",
-                        "Program Name": name,
-                        "Accredited": accredited,
-                        "Type": program_type,
-                        "Concentrations? Yes or No": "Yes" if program_type == "Concentration" else "No",
-                        "Total Credit Hours in Program": credit,
-                        "Program Length Measurement": "Semester",
-                        "Full-Time Enrollment": 12,
-                        "Page Number": page_num,
-                        "Educational Objective": edu,
-                        "License Prep": license_prep,
-                        "Modality": modality,
-                    })
-                break
-    return results
+def iter_program_names(
+    pdf_path: Path | PdfSource,
+    checkpoint: Checkpoint | None = None,
+    quick: QuickLook | None = None,
+    cancelled: Callable[[], bool] | None = None
+) -> Iterator[ProgramRecord]:
+    """
+    Yield one enriched report row per program as soon as its page is scanned.
+
+    With a `checkpoint`, rows committed by an interrupted run are replayed first
+    and scanning resumes from the last committed page. With `quick`, only the
+    pages the quick-look plan hands out before its deadline are visited.
+    `cancelled()` is checked before every page; once it is true the scan stops
+    with JobCancelled (the checkpoint is saved first).
+    """
+    source = as_source(pdf_path)
+    texts = source.extractor()
+    prefilter = page_prefilter(source, UG_PREFILTER)
+    checkpoint = checkpoint or Checkpoint(None)
+    start = checkpoint.next_page if checkpoint.resumed else 0
+    completed = False
+
+    yield from list(checkpoint.records)
+
+    try:
+        pages = quick.pages("programs", start, texts.page_count) if quick else range(start, texts.page_count)
+        for i in pages:
+            checkpoint.advance("programs", i)  # every page before i has been fully emitted
+            if cancelled is not None and cancelled():
+                raise JobCancelled()
+            if prefilter is not None and i not in texts.store and not prefilter.may_match(i):
+                continue  # cannot hold a program title; not extracted
+            page = texts.page(i)
+            if not len(page):
+                continue
+
+            page_num = extract_catalog_page_number(page)
+            if not page_num or page_num <= 145:
+                continue
+            # Titles only follow the running header; pages without it never need splitting
+            if not page.search(UNDERGRADUATE_CATALOG):
+                continue
+
+            for j, line in enumerate(page.iter_lines()):
+                if "UNIVERSITY OF SOUTH FLORIDA" in line.upper() and "UNDERGRADUATE CATALOG" in line.upper():
+                    title_lines = []
+                    for next_line in _nonblank_lines(page, j + 1):
+                        if re.search(r"[a-z]", next_line): break
+                        if "TOTAL DEGREE HOURS" in next_line.upper(): break
+                        title_lines.append(next_line)
+
+                    full_title = " ".join(title_lines)
+                    if full_title and is_valid_program_name(full_title):
+                        name = format_program_name(full_title)
+                        name = re.sub(r"^\d+\s+", "", name)
+                        name = re.sub(r"\s*Total\s+(Minor|Major|Certificate)?\s*Hours:\s*\d+", "", name, flags=re.IGNORECASE)
+                        name = re.sub(r"\s*Minor Requirements$", "", name, flags=re.IGNORECASE)
+                        name = re.sub(r"\(\s*\d+\s+Credit\s+Hours\s*\)", "", name, flags=re.IGNORECASE)
+                        name = re.sub(r"\s*-\s*\d+\s*$", "", name).strip()
+
+                        if any(x in name.upper() for x in [
+                            "STATE MANDATED", "ADDITIONAL INFORMATION", "PROGRESSION REQUIREMENTS",
+                            "ADVISING INFORMATION", "STATE MATHEMATICS PATHWAY", "RESEARCH OPPORTUNITIES",
+                            "TRAINING OPTION HTTPS", "TWO SPC", "CREDIT HOURS CONCENTRATION",
+                            "CONCENTRATION CORE", "ELECTIVE COURSES", "MINOR MINOR", "CONCENTRATION CORE COURSE",
+                            "INTERNSHIP OPPORTUNITIES", "RESPONSIBLE AND INCLUSIVE", "CONCENTRATION REQUIREMENT"
+                        ]):
+                            continue
+
+                        program_type = classify_program_type(name)
+                        # Normalise the block once; every extractor below reads from it
+                        block = ProgramWindow.from_lines(
+                            list(islice(_nonblank_lines(page, j + 1), 74)), index=texts.index, pages=(i,)
+                        )
+                        credit = {
+                            "Major": extract_major_credit_hours,
+                            "Concentration": extract_concentration_credit_hours,
+                            "Certificate": extract_certificate_credit_hours,
+                            "Minor": extract_minor_credit_hours
+                        }.get(program_type, lambda _: None)(block)
+
+                        edu = {"Major": "Bachelor", "Minor": "Bachelor", "Concentration": "Bachelor", "Certificate": "Certificate"}.get(program_type, "Unknown")
+                        modality = extract_modality_from_lines(
+                            ProgramWindow.from_lines(block.lines[:19], index=texts.index, pages=(i,))
+                        )
+                        license_prep = has_license_prep(block)
+                        accredited = is_accredited(block)
+
+                        record = ProgramRecord(
+                            UG_COLUMNS,
+                            # pid="",
+                            name=name,
+                            accredited=accredited,
+                            program_type=program_type,
+                            concentrations="Yes" if program_type == "Concentration" else "No",
+                            credit_hours=credit,
+                            length_measurement="Semester",
+                            full_time_enrollment=12,
+                            page_number=page_num,
+                            educational_objective=edu,
+                            license_prep=license_prep,
+                            modality=modality,
+                        )
+                        checkpoint.add(record)
+                        yield record
+                    break
+        completed = True
+        checkpoint.clear()
+    finally:
+        if not completed:
+            checkpoint.save()
+
+def extract_program_names(pdf_path: Path | PdfSource) -> list:
+    return list(iter_program_names(pdf_path))
 
 def export_to_excel(data: list, output_path: Path) -> pd.DataFrame:
     if not data:
@@ -227,7 +325,38 @@ def export_to_excel(data: list, output_path: Path) -> pd.DataFrame:
 
     df.to_excel(output_path, index=False)
 
-def run_ug_parser(input_pdf: str) -> pd.DataFrame:
-    program_data = extract_program_names(Path(input_pdf))
-    df = pd.DataFrame(program_data)
-    return df
\ No newline at end of file
+def run_ug_parser(
+    input_pdf,
+    on_program: Callable[[dict], None] | None = None,
+    resume: bool = False,
+    time_budget: float | None = None,
+    sample_rate: float | None = None,
+    pages: tuple[int, int] | None = None,
+    section: str | None = None
+) -> pd.DataFrame:
+    """
+    Parse the undergraduate catalog from a path, bytes, an uploaded file or a PdfSource.
+    `on_program` is called with each row as soon as it has been enriched; with
+    `resume`, progress is checkpointed and a retry continues where it stopped.
+    `time_budget` / `sample_rate` / `pages` / `section` make it a quick look
+    (see run_gr_parser).
+    """
+    source = as_source(input_pdf)
+    quick = QuickLook.for_source(source, time_budget, sample_rate, pages, section)
+    if quick and resume:
+        raise ValueError("A quick look only covers part of the catalog and cannot be resumed")
+    checkpoint = Checkpoint.for_source("ug", source) if resume else None
+    program_data = ProgramFrameBuilder(UG_COLUMNS)
+    try:
+        for record in iter_program_names(source, checkpoint=checkpoint, quick=quick):
+            program_data.add(record)
+            if on_program:
+                on_program(record)
+    finally:
+        if source is not input_pdf:
+            source.close()  # opened here; also writes the text cache when enabled
+    df = program_data.frame()
+    if quick:
+        df = df.sort_values("Page Number", kind="stable", ignore_index=True)
+        df.attrs["quick_look"] = quick.summary()
+    return df
@@ -0,0 +1,399 @@
+# catalog_parser/workers.py
+'''
+Long-lived pool of pre-warmed parser processes.
+
+Streamlit re-runs the page script on every click, but this module (like the
+scheduler) is imported once per server, so the pool outlives reruns. Each
+worker imports pandas, the PDF libraries and the parser modules (compiling
+their rule tables) when it starts, then waits for tasks:
+
+    for item in get_pool().run("catalog_parser.merge", "catalog_job_items", grad, ug):
+        ...
+
+A task names a generator function by module and name; its items are streamed
+back as they are produced. A task that can run for a while without producing
+an item calls `cancel_requested()` between units of work (the parsers do it
+before every page) and raises JobCancelled once it is true. A monitor thread pings idle workers, and workers
+that die, stop answering or grow past `OVS_WORKER_MAX_RSS_MB` are replaced.
+Set OVS_WORKER_PROCESSES=0 to parse in the server process instead.
+'''
+import importlib
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+import types
+from typing import Callable, Iterator
+
+from .scheduler import MAX_CONCURRENT_PARSES, JobCancelled
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+WORKER_PROCESSES = int(os.environ.get("OVS_WORKER_PROCESSES", str(MAX_CONCURRENT_PARSES)))
+MAX_WORKER_RSS_MB = float(os.environ.get("OVS_WORKER_MAX_RSS_MB", "1500"))
+HEALTH_INTERVAL = 30.0   # seconds between pings of an idle worker
+PING_TIMEOUT = 5.0
+WARM_TIMEOUT = 120.0     # a worker that has not finished importing by then is replaced
+POLL_SECONDS = 0.25      # how often a running task checks for a dead worker or a cancel
+DRAIN_TIMEOUT = 10.0     # wait for an abandoned task to stop before replacing its worker
+
+# Imported by every worker before it takes a task
+WARM_MODULES = (
+    "pandas",
+    "PyPDF2",
+    "pdfplumber",
+    "catalog_parser.backends",
+    "catalog_parser.gr_parser",
+    "catalog_parser.ug_parser",
+    "catalog_parser.merge",
+)
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # kB on Linux
+
+# ---------------------------
+# Worker side
+# ---------------------------
+_task_conn = None      # pipe to the server while a task runs in this worker
+_task_cancelled = False
+
+def cancel_requested() -> bool:
+    """
+    Inside a worker task: True once the server has asked the task to stop.
+    Always False outside a worker, so tasks can call it unconditionally.
+    """
+    global _task_cancelled
+    # The server only writes to a busy worker to cancel its task
+    if _task_conn is not None and not _task_cancelled and _task_conn.poll():
+        _task_conn.recv()
+        _task_cancelled = True
+    return _task_cancelled
+
+def _warm(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass  # optional backends; the task itself reports anything really missing
+    try:
+        from .backends import available_backends
+        available_backends()  # reads the calibration file once
+    except Exception:
+        pass
+
+def _run_task(conn, module: str, name: str, args: tuple):
+    global _task_conn, _task_cancelled
+    _task_conn, _task_cancelled = conn, False
+    items = getattr(importlib.import_module(module), name)(*args)
+    try:
+        for item in items:
+            conn.send(("item", item))
+            if cancel_requested():
+                conn.send(("cancelled", _peak_rss_mb()))
+                return
+    except JobCancelled:
+        conn.send(("cancelled", _peak_rss_mb()))
+        return
+    finally:
+        _task_conn = None
+        if hasattr(items, "close"):
+            items.close()  # runs the task's cleanup (checkpoint save, source close) on cancel too
+    conn.send(("done", _peak_rss_mb()))
+
+def _worker_main(conn, modules):
+    # Ctrl-C on the server reaches the whole process group; the server shuts workers down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _warm(modules)
+    conn.send(("ready", _peak_rss_mb()))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return  # the server went away
+        kind = message[0]
+        if kind == "stop":
+            return
+        if kind == "ping":
+            conn.send(("pong", _peak_rss_mb()))
+        elif kind == "run":
+            try:
+                _run_task(conn, *message[1:])
+            except Exception as exc:
+                try:
+                    conn.send(("error", exc, traceback.format_exc()))
+                except Exception:  # the exception itself does not pickle
+                    conn.send(("error", RuntimeError(repr(exc)), traceback.format_exc()))
+        # a "cancel" that arrives after its task finished is simply dropped
+
+# ---------------------------
+# Server side
+# ---------------------------
+_start_lock = threading.Lock()
+
+def _start(process):
+    # A spawned child re-runs the parent's __main__. Under Streamlit that is the app
+    # script, so the worker is started with a bare __main__ in its place.
+    with _start_lock:
+        main = sys.modules.get("__main__")
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            process.start()
+        finally:
+            sys.modules["__main__"] = main
+
+
+class Worker:
+    def __init__(self, context, modules=WARM_MODULES):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, modules), name="catalog-worker", daemon=True)
+        _start(self.process)
+        child.close()
+        self.started = time.monotonic()
+        self.ready = False
+        self.rss_mb = None
+        self.tasks = 0
+
+    def _note(self, kind: str, rss_mb):
+        if kind == "ready":
+            self.ready = True
+        if rss_mb is not None:
+            self.rss_mb = rss_mb
+
+    def _crashed(self) -> WorkerCrashed:
+        self.process.join(1)  # the pipe closes a moment before the exit code is available
+        return WorkerCrashed(f"Worker {self.process.pid} exited with code {self.process.exitcode}")
+
+    def recv(self, timeout: float | None = None):
+        """Next message other than the start-up "ready", or None on timeout. Raises WorkerCrashed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                if not self.conn.poll(wait):
+                    if not self.process.is_alive():
+                        raise self._crashed()
+                    return None
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                raise self._crashed()
+            if message[0] == "ready":
+                self._note(*message)
+                continue
+            return message
+
+    def ping(self) -> bool:
+        try:
+            self.conn.send(("ping",))
+            message = self.recv(PING_TIMEOUT)
+        except (WorkerCrashed, OSError):
+            return False
+        if message is None or message[0] != "pong":
+            return False
+        self._note(*message)
+        return True
+
+    def stop(self):
+        try:
+            self.conn.send(("stop",))
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(1)
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    `size` warm worker processes. `run()` borrows an idle worker for one task;
+    callers are expected to limit their own concurrency (the scheduler does),
+    otherwise they wait for a worker to come free.
+    """
+
+    def __init__(self, size: int = WORKER_PROCESSES, max_rss_mb: float = MAX_WORKER_RSS_MB,
+                 health_interval: float = HEALTH_INTERVAL, modules=WARM_MODULES):
+        self.size = max(1, size)
+        self.max_rss_mb = max_rss_mb
+        self.health_interval = health_interval
+        self.modules = modules
+        # spawn, not fork: the Streamlit server is multi-threaded
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = []
+        self._busy = set()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.replaced = {"crashed": 0, "bloated": 0, "unresponsive": 0}
+        with self._cond:
+            for _ in range(self.size):
+                self._idle.append(Worker(self._context, self.modules))
+        threading.Thread(target=self._monitor, name="catalog-worker-monitor", daemon=True).start()
+
+    # ---------- borrowing ----------
+
+    def _checkout(self) -> Worker:
+        with self._cond:
+            while not self._idle:
+                if self._closed:
+                    raise RuntimeError("Worker pool is closed")
+                self._cond.wait()
+            worker = self._idle.pop(0)
+            self._busy.add(worker)
+            return worker
+
+    def _checkin(self, worker: Worker, reason: str | None = None):
+        if reason is None and self.max_rss_mb and (worker.rss_mb or 0) > self.max_rss_mb:
+            reason = "bloated"
+        returned = worker
+        if reason is not None:
+            worker.stop()
+            self.replaced[reason] += 1
+            returned = None if self._closed else Worker(self._context, self.modules)
+        with self._cond:
+            self._busy.discard(worker)
+            if returned is not None:
+                self._idle.append(returned)
+            self._cond.notify()
+
+    def _abandon(self, worker: Worker) -> str | None:
+        # Cancel a task nobody is reading any more; the worker is only kept if it stops cleanly
+        try:
+            worker.conn.send(("cancel",))
+            deadline = time.monotonic() + DRAIN_TIMEOUT
+            while time.monotonic() < deadline:
+                message = worker.recv(POLL_SECONDS)
+                if message is not None and message[0] in ("done", "cancelled", "error"):
+                    return None
+        except (WorkerCrashed, OSError):
+            return "crashed"
+        return "unresponsive"
+
+    def run(self, module: str, name: str, *args, cancelled: Callable[[], bool] | None = None) -> Iterator:
+        """
+        Stream the items of `module.name(*args)` computed in a worker. Raises
+        TaskCancelled once `cancelled()` turns true and the worker has stopped,
+        WorkerCrashed if the worker dies (it is replaced), or the task's own error.
+        """
+        worker = self._checkout()
+        reason = None
+        try:
+            worker.tasks += 1
+            worker.conn.send(("run", module, name, args))
+            cancel_sent = False
+            while True:
+                message = worker.recv(POLL_SECONDS)
+                if message is None:
+                    if cancelled and not cancel_sent and cancelled():
+                        worker.conn.send(("cancel",))
+                        cancel_sent = True
+                    continue
+                kind = message[0]
+                if kind == "item":
+                    yield message[1]
+                    if cancelled and not cancel_sent and cancelled():
+                        worker.conn.send(("cancel",))
+                        cancel_sent = True
+                elif kind in ("done", "cancelled"):
+                    worker._note(*message)
+                    if kind == "cancelled":
+                        raise TaskCancelled()
+                    return
+                elif kind == "error":
+                    raise message[1]
+        except WorkerCrashed:
+            reason = "crashed"
+            raise
+        except GeneratorExit:
+            reason = self._abandon(worker)
+            raise
+        finally:
+            self._checkin(worker, reason)
+
+    def wait_ready(self, timeout: float = WARM_TIMEOUT) -> bool:
+        """Block until every worker has finished importing, or `timeout`; True if they all have."""
+        deadline = time.monotonic() + timeout
+        while True:
+            self.check()
+            with self._cond:
+                if all(w.ready for w in self._idle + list(self._busy)):
+                    return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_SECONDS)
+
+    # ---------- health ----------
+
+    def _monitor(self):
+        while not self._closed:
+            time.sleep(self.health_interval)
+            self.check()
+
+    def check(self):
+        """Ping every idle worker once; replace the dead, hung, bloated or stuck-warming ones."""
+        with self._cond:
+            workers, self._idle = self._idle, []
+            self._busy.update(workers)
+        for worker in workers:
+            reason = None
+            if not worker.process.is_alive():
+                reason = "crashed"
+            elif not worker.ready:
+                try:
+                    worker.recv(0)
+                except WorkerCrashed:
+                    reason = "crashed"
+                if reason is None and not worker.ready and time.monotonic() - worker.started > WARM_TIMEOUT:
+                    reason = "unresponsive"
+            elif not worker.ping():
+                reason = "crashed" if not worker.process.is_alive() else "unresponsive"
+            self._checkin(worker, reason)
+
+    def stats(self) -> dict:
+        with self._cond:
+            workers = self._idle + list(self._busy)
+            return {
+                "workers": len(workers),
+                "idle": len(self._idle),
+                "tasks": sum(w.tasks for w in workers),
+                "rss_mb": [w.rss_mb for w in workers],
+                "replaced": dict(self.replaced),
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            workers, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in workers:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> WorkerPool | None:
+    """The process-wide worker pool (started on first use), or None when OVS_WORKER_PROCESSES=0."""
+    global _pool
+    if WORKER_PROCESSES <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+        return _pool
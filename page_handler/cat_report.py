@@ -1,12 +1,55 @@
 # page_handler/reports.py
+import time
 import streamlit as st
-import pandas as pd
-from catalog_parser.merge import combine_catalogs
-from utils.approval_logic import apply_approval_logic
+from utils.export import EXPORT_FORMATS
+
+REFRESH_SECONDS = 0.5  # throttle for live table redraws while parsing
+
+# Catalog labels used by catalog_parser.merge (kept here so the page loads without the parser)
+GRADUATE = "Graduate"
+UNDERGRADUATE = "Undergraduate"
+
+def _draw_progress(counts_slot, table_slot, rows: dict[str, list[dict]]):
+    import pandas as pd
+
+    counts_slot.markdown(
+        f"**Programs found:** {GRADUATE} {len(rows[GRADUATE])} · {UNDERGRADUATE} {len(rows[UNDERGRADUATE])}"
+    )
+    table_slot.dataframe(
+        pd.DataFrame([r for catalog in (GRADUATE, UNDERGRADUATE) for r in rows[catalog]]),
+        use_container_width=True,
+    )
+
+def _collect(job, rows: dict[str, list[dict]], seen: int) -> int:
+    # Copy records the shared job has published since the last look
+    published = job.records[seen:]
+    for catalog, record in published:
+        rows[catalog].append(record)
+    return seen + len(published)
+
+def _show_quick_look(catalog: str, summary: dict, section: str):
+    if section and summary.get("section") is None:
+        st.info(f"{catalog}: no bookmark mentions “{section}”; nothing scanned.")
+        return
+    scanned = f"{summary['pages_scanned']} of {summary['pages_total']} pages in {summary['elapsed_s']} s"
+    if summary.get("section"):
+        scanned += f" under “{summary['section']}”, PDF pages {summary['range'][0]}–{summary['range'][1]}"
+    if summary["complete"]:
+        st.success(f"{catalog}: every page scanned ({scanned}).")
+        return
+    ranges = [r for stage_ranges in summary["skipped"].values() for r in stage_ranges]
+    shown = ", ".join(f"{a}" if a == b else f"{a}–{b}" for a, b in sorted(set(ranges))[:12])
+    more = f" and {len(ranges) - 12} more ranges" if len(ranges) > 12 else ""
+    st.info(f"{catalog}: partial preview ({scanned}). Skipped PDF pages: {shown}{more}.")
 
 def show():
     st.title("Catalog Report Generator")
 
+    # Start the server's parser workers on the first visit (no-op afterwards) so
+    # they have pandas and the PDF stack imported by the time a report is requested
+    from catalog_parser.workers import get_pool
+    get_pool()
+
     # === Step 1: Academic year selection ===
     academic_year = st.selectbox(
         "Select the current academic year:",
@@ -16,27 +59,143 @@ def show():
 
     # Generate year suffix (e.g., "2425")
     year_suffix = academic_year[2:4] + academic_year[7:]
-    output_filename = f"{year_suffix}_Report.xlsx"
+    output_stem = f"{year_suffix}_Report"
 
     # === Step 2: File uploaders ===
     st.subheader("Upload Required Files")
     grad_catalog_pdf = st.file_uploader("Graduate Catalog PDF", type="pdf")
     ug_catalog_pdf = st.file_uploader("Undergraduate Catalog PDF", type="pdf")
 
+    # === Optional: quick look ===
+    with st.expander("Quick look (preview in seconds)"):
+        st.caption(
+            "Scans section-start pages first and stops at the time limit. "
+            "Useful to check that a new catalog parses before generating the full report."
+        )
+        quick_budget = st.slider("Time budget (seconds)", 2, 60, 10, key="quick_look_budget")
+        quick_section = st.text_input(
+            "Only one section (optional): a bookmark title, e.g. a college name", key="quick_look_section"
+        ).strip()
+        if st.button("Preview catalogs", key="quick_look"):
+            if all([grad_catalog_pdf, ug_catalog_pdf]):
+                from catalog_parser.merge import submit_quick_look
+                from catalog_parser.scheduler import get_scheduler
+
+                # Previews share the report scheduler's concurrency limit; the budget starts when it runs
+                scheduler = get_scheduler()
+                job = submit_quick_look(
+                    grad_catalog_pdf, ug_catalog_pdf, time_budget=quick_budget, section=quick_section or None
+                )
+                status_slot = st.empty()
+                try:
+                    with st.spinner("Previewing catalogs..."):
+                        while not job.wait(REFRESH_SECONDS):
+                            position = scheduler.position(job)
+                            if position:
+                                status_slot.info(f"Other reports are being generated. Position in queue: {position}")
+                            else:
+                                status_slot.empty()
+                    status_slot.empty()
+                finally:
+                    if not job.done():
+                        scheduler.release(job)
+                preview_df, summaries = job.outcome()
+                for catalog, summary in summaries.items():
+                    _show_quick_look(catalog, summary, quick_section)
+                st.dataframe(preview_df, use_container_width=True)
+            else:
+                st.warning("Please upload **both catalogs** before previewing.")
+
     # === Step 3: Generate Step 1 Report ===
     if st.button("Generate Catalog Report"):
         if all([grad_catalog_pdf, ug_catalog_pdf]):
-            with st.spinner("Generating catalog report..."):
-                combined_df, combined_path = combine_catalogs(
-                    grad_catalog_pdf,
-                    ug_catalog_pdf,
-                    output_name=output_filename
-                )
+            # Parsing stack (pandas, PyPDF2, pdfplumber) is only imported once a report is requested
+            from catalog_parser.merge import submit_catalogs
+            from catalog_parser.scheduler import get_scheduler
 
-                st.success("Catalog Report generated successfully!")
+            st.session_state.pop("catalog_report", None)
+            # Clicking Cancel reruns the script, which interrupts the wait below at its next
+            # UI update; the rows found so far survive in session_state.
+            st.button("Cancel", key="cancel_catalog_report")
+            rows = {GRADUATE: [], UNDERGRADUATE: []}
+            st.session_state["catalog_partial"] = rows
 
-                with open(combined_path, "rb") as f:
-                    st.download_button("Download Catalog Report", f, file_name=output_filename)
+            # The parse runs on the shared scheduler: it may queue behind other sessions'
+            # reports, and sessions uploading the same catalogs all wait on one parse.
+            # It is resumable, so a cancelled or crashed run continues from its checkpoint.
+            scheduler = get_scheduler()
+            job = submit_catalogs(grad_catalog_pdf, ug_catalog_pdf)
+            status_slot, counts_slot, table_slot = st.empty(), st.empty(), st.empty()
+            seen = 0
+            try:
+                with st.spinner("Generating catalog report..."):
+                    while not job.wait(REFRESH_SECONDS):
+                        position = scheduler.position(job)
+                        if position:
+                            status_slot.info(f"Other reports are being generated. Position in queue: {position}")
+                            continue
+                        status_slot.empty()
+                        seen = _collect(job, rows, seen)
+                        _draw_progress(counts_slot, table_slot, rows)
+                status_slot.empty()
+                _collect(job, rows, seen)
+                _draw_progress(counts_slot, table_slot, rows)
+            finally:
+                # Leaving early (Cancel / rerun): the parse stops only if no other session wants it
+                if not job.done():
+                    scheduler.release(job)
+
+            # Keep the result across reruns (format picker / download clicks rerun the script)
+            st.session_state["catalog_report"] = job.outcome()
+            st.session_state["catalog_exports"] = {}   # (sheet, format) -> file bytes
+            st.session_state.pop("catalog_partial", None)
+            st.success("Catalog Report generated successfully!")
 
         else:
-            st.warning("Please upload **both catalogs** before generating the report.")
\ No newline at end of file
+            st.warning("Please upload **both catalogs** before generating the report.")
+
+    elif "catalog_partial" in st.session_state:
+        # The previous run was cancelled before it finished
+        rows = st.session_state.pop("catalog_partial")
+        found = sum(len(r) for r in rows.values())
+        st.warning(
+            f"Report generation cancelled after {found} programs. Nothing was exported; "
+            "generate again with the same files to continue from the last checkpoint."
+        )
+        _draw_progress(st.empty(), st.empty(), rows)
+
+    # === Step 4: Export ===
+    combined_df = st.session_state.get("catalog_report")
+    if combined_df is not None:
+        from utils.export import cached_export, export_filename, export_mime
+
+        export_format = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True, key="catalog_export_format")
+        st.download_button(
+            "Download Catalog Report",
+            cached_export(
+                st.session_state.setdefault("catalog_exports", {}), combined_df, export_format,
+                sheet_name="Catalog Report",
+            ),
+            file_name=export_filename(output_stem, export_format),
+            mime=export_mime(export_format),
+        )
+
+    # === Step 5: Search the catalogs ===
+    if all([grad_catalog_pdf, ug_catalog_pdf]):
+        st.subheader("Search the Catalogs")
+        query = st.text_input(
+            "Find a word or phrase (e.g. licensure, not accredited, fully online)", key="catalog_search"
+        ).strip()
+        if query:
+            from catalog_parser.merge import search_catalogs
+
+            # Each catalog is indexed once, as a job on the shared scheduler (continuing from the
+            # text its report extracted); later searches are instant
+            with st.spinner("Searching catalogs..."):
+                hits = search_catalogs({GRADUATE: grad_catalog_pdf, UNDERGRADUATE: ug_catalog_pdf}, query)
+            if hits.empty:
+                st.info(f"No pages mention “{query}”.")
+            else:
+                pages = hits.groupby("Catalog")["PDF Page"].nunique()
+                st.caption(" · ".join(f"{catalog}: {pages.get(catalog, 0)} pages" for catalog in (GRADUATE, UNDERGRADUATE)))
+                st.dataframe(hits, use_container_width=True, hide_index=True)
@@ -1,94 +1,20 @@
 # comparison.py
 import streamlit as st
 import pandas as pd
-import re
-
-def clean_program_names(df, col):
-    """
-    Clean program names by:
-    - Removing extra spaces around dashes
-    - Ensuring standard credentials have trailing periods
-    """
-    df[col] = df[col].astype(str).apply(lambda x: re.sub(r'\s*-\s*', '-', x.strip()))
-
-    # Add trailing periods to credentials if missing
-    credentials = [
-        "M.S", "M.A", "B.S", "B.A", "Ph.D", "Ed.D", "Ed.S", "M.F.A", "D.B.A", "D.N.P", 
-        "M.P.A", "M.B.A", "Au.D", "M.S.B", "M.S.C.S", "M.S.B.E", "M.S.C.P", "M.S.E.M"
-    ]
-
-    for cred in credentials:
-        df[col] = df[col].str.replace(rf'\b{cred}(?!\.)\b', f"{cred}.", regex=True)
-
-def find_program_column(columns):
-    for col in columns:
-        col_str = str(col).strip()
-        if "program" in col_str.lower() and "name" in col_str.lower():
-            return col
-    return None
+from utils import comparison
+from utils.export import EXPORT_FORMATS, cached_export, export_filename, export_mime
 
 def compare_reports(df_old: pd.DataFrame, df_new: pd.DataFrame):
     """
-    Compare two catalog reports and identify:
-      - Added programs (in new, not in old)
-      - Removed programs (in old, not in new)
-      - Changed programs (same program but different attributes)
+    Page wrapper around utils.comparison.compare_reports: a missing
+    'Program Name' column is shown as an error and yields empty results.
     """
-
-    # Detect key columns
-    col_old = find_program_column(df_old.columns)
-    col_new = find_program_column(df_new.columns)
-
-    # Clean names before comparing
-    if col_old:
-        clean_program_names(df_old, col_old)
-    if col_new:
-        clean_program_names(df_new, col_new)
-
-    # ✅ Debug info: show what columns were found
-    # st.write("Detected columns in report 1:", list(df_old.columns))
-    # st.write("Detected columns in report 2:", list(df_new.columns))
-    # st.write("Auto-detected key columns:", col_old, col_new)
-
-    # ✅ Handle case where the column isn't found
-    if not col_old or not col_new:
-        st.error(
-            "❌ Could not find a 'Program Name' column in one of the reports!\n\n"
-            f"Old report columns: {list(df_old.columns)}\n"
-            f"New report columns: {list(df_new.columns)}"
-        )
+    try:
+        return comparison.compare_reports(df_old, df_new)
+    except comparison.MissingProgramColumn as exc:
+        st.error(f"❌ {exc}")
         return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
-    # ✅ Now safely use the detected columns
-    old_names = set(df_old[col_old])
-    new_names = set(df_new[col_new])
-
-    # --- Find Added ---
-    added = df_new[df_new[col_new].isin(new_names - old_names)]
-
-    # --- Find Removed ---
-    removed = df_old[df_old[col_old].isin(old_names - new_names)]
-
-    # --- Find Changed ---
-    common = old_names.intersection(new_names)
-    df_common_old = df_old[df_old[col_old].isin(common)].set_index(col_old)
-    df_common_new = df_new[df_new[col_new].isin(common)].set_index(col_new)
-
-    changed_rows = []
-    for program in common:
-        old_row = df_common_old.loc[program]
-        new_row = df_common_new.loc[program]
-
-        if not old_row.equals(new_row):
-            diff = pd.concat([old_row, new_row], axis=1)
-            diff.columns = ["Old", "New"]
-            diff.insert(0, "Program Name", program)
-            changed_rows.append(diff.reset_index())
-
-    changed = pd.concat(changed_rows, ignore_index=True) if changed_rows else pd.DataFrame()
-
-    return added, removed, changed
-
 def show():
     st.title("Year-to-Year Comparison Report")
 
@@ -98,60 +24,86 @@ def show():
     report_old = st.file_uploader("Upload Report :one:", type=["xlsx"], key="old_report")
     report_new = st.file_uploader("Upload Report :two:", type=["xlsx"], key="new_report")
 
-    # === Ask for sheet name ===
+    # === Sheet / header row (auto-detected unless overridden) ===
     sheet_name = st.text_input(
-        "Enter the **sheet name** where the data is located",
-        value="PROGRAM SHEET"  # default
+        "Enter the **sheet name** where the data is located (leave blank to auto-detect)",
+        value=""
     )
-
-    # === Ask for first row number ===
+    auto_header = st.checkbox("Auto-detect the header row", value=True)
     first_row_number = st.number_input(
         "Enter the **header row number**",
         min_value=1,
         value=5,  # default row number
-        step=1
+        step=1,
+        disabled=auto_header
     )
 
-    # Calculate how many rows to skip for pd.read_excel
-    skiprows_count = first_row_number - 1 if first_row_number > 1 else 0
-
-
     if st.button("Compare Reports"):
         if report_old and report_new:
             with st.spinner("Comparing reports..."):
+                # Lazy: openpyxl is only needed once a comparison is requested
+                from utils.report_loader import load_reports
 
-                # Load dataframes using user-defined sheet + skiprows
+                # Both workbooks are read concurrently and cached by file hash,
+                # so re-running with other options does not re-read them
                 try:
-                    df_old = pd.read_excel(
-                        report_old,
-                        sheet_name=sheet_name,
-                        skiprows=skiprows_count
-                    )
-                    df_new = pd.read_excel(
-                        report_new,
-                        sheet_name=sheet_name,
-                        skiprows=skiprows_count
+                    (df_old, info_old), (df_new, info_new) = load_reports(
+                        [report_old.getvalue(), report_new.getvalue()],
+                        sheet_name=sheet_name.strip() or None,
+                        header_row=None if auto_header else int(first_row_number)
                     )
                 except Exception as e:
                     st.error(f"❌ Error reading Excel files: {e}")
                     return
 
+                st.caption(
+                    f"Report 1: sheet **{info_old['sheet']}**, header row {info_old['header_row']} · "
+                    f"Report 2: sheet **{info_new['sheet']}**, header row {info_new['header_row']}"
+                )
+
                 # Compare
                 added, removed, changed = compare_reports(df_old, df_new)
 
-                # Show results
+                # Keep results across reruns so the export controls below keep working
+                st.session_state["comparison_results"] = {
+                    "Added": added, "Removed": removed, "Changed": changed
+                }
+                st.session_state["comparison_exports"] = {}   # (sheet, format) -> file bytes
                 st.success("Comparison Complete!")
-
-                st.write("### :heavy_plus_sign: Added Programs")
-                st.dataframe(added if not added.empty else pd.DataFrame({"Result": ["No new programs"]}))
-
-                st.write("### :heavy_minus_sign: Removed Programs")
-                st.dataframe(removed if not removed.empty else pd.DataFrame({"Result": ["No removed programs"]}))
-
-                st.write("### 🔄 Changed Programs")
-                if not changed.empty:
-                    st.write(changed)
-                else:
-                    st.info("No changed programs detected.")
         else:
-            st.warning("⚠️ Please upload **both reports** to run the comparison.")
\ No newline at end of file
+            st.warning("⚠️ Please upload **both reports** to run the comparison.")
+
+    results = st.session_state.get("comparison_results")
+    if results is None:
+        return
+
+    added, removed, changed = results["Added"], results["Removed"], results["Changed"]
+
+    # Show results
+    st.write("### :heavy_plus_sign: Added Programs")
+    st.dataframe(added if not added.empty else pd.DataFrame({"Result": ["No new programs"]}))
+
+    st.write("### :heavy_minus_sign: Removed Programs")
+    st.dataframe(removed if not removed.empty else pd.DataFrame({"Result": ["No removed programs"]}))
+
+    st.write("### 🔄 Changed Programs")
+    if not changed.empty:
+        st.write(changed)
+    else:
+        st.info("No changed programs detected.")
+
+    # === Export ===
+    st.write("### :inbox_tray: Export Results")
+    export_format = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True, key="comparison_export_format")
+    exports = st.session_state.setdefault("comparison_exports", {})
+    cols = st.columns(len(results))
+    for col, (label, df) in zip(cols, results.items()):
+        with col:
+            st.download_button(
+                f"Download {label}",
+                cached_export(exports, df, export_format, sheet_name=label) if not df.empty else b"",
+                file_name=export_filename(f"{label.lower()}_programs", export_format),
+                mime=export_mime(export_format),
+                disabled=df.empty,
+                key=f"download_{label.lower()}",
+            )
@@ -0,0 +1,302 @@
+# service.py
+'''
+Standalone HTTP job service for the catalog parsers (no Streamlit needed).
+
+    python service.py --host 127.0.0.1 --port 8600 --workers 2
+
+Endpoints:
+    POST /jobs?parser=gr|ug                  body: catalog PDF        -> 202 {"job_id", "status", ...}
+    GET  /jobs/<job_id>                                               -> job status
+    GET  /jobs/<job_id>/result?format=json|parquet                    -> parsed programs
+    POST /compare   body: {"old": rows | job_id, "new": rows | job_id} -> {"added", "removed", "changed"}
+
+Requests are served on one asyncio loop; parses run in a process pool so a long
+catalog never blocks other clients. Submitting a PDF that is already queued or
+parsed (same content hash, parser, parser version and extraction backend order)
+returns the existing job.
+'''
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from catalog_parser import PARSER_VERSION
+from catalog_parser.backends import backend_order
+from catalog_parser.scheduler import MAX_CONCURRENT_PARSES
+from utils.comparison import MissingProgramColumn, compare_reports
+
+MAX_BODY_BYTES = 200 * 1024 * 1024
+JOB_HISTORY = 100   # finished jobs kept for polling / result download
+PARSERS = ("gr", "ug")
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+# ---------------------------
+# Worker side (runs in the pool)
+# ---------------------------
+def _parse(parser: str, data: bytes) -> pd.DataFrame:
+    if parser == "gr":
+        from catalog_parser.gr_parser import run_gr_parser
+        return run_gr_parser(data)
+    from catalog_parser.ug_parser import run_ug_parser
+    return run_ug_parser(data)
+
+# ---------------------------
+# Jobs
+# ---------------------------
+class ParseJob:
+    def __init__(self, parser: str, sha256: str, future, key=None):
+        self.id = uuid.uuid4().hex
+        self.parser = parser
+        self.sha256 = sha256
+        self.key = key
+        self.future = future
+        self.submitted = time.time()
+        self.finished = None
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        if self.future.cancelled():
+            return "cancelled"
+        return "failed" if self.future.exception() else "done"
+
+    def frame(self) -> pd.DataFrame:
+        if self.status != "done":
+            raise HttpError(409, f"Job {self.id} is {self.status}")
+        return self.future.result()
+
+    def to_json(self) -> dict:
+        info = {
+            "job_id": self.id,
+            "parser": self.parser,
+            "sha256": self.sha256,
+            "parser_version": PARSER_VERSION,
+            "status": self.status,
+            "submitted": self.submitted,
+            "finished": self.finished,
+        }
+        if info["status"] == "done":
+            info["programs"] = len(self.future.result())
+        elif info["status"] == "failed":
+            info["error"] = repr(self.future.exception())
+        return info
+
+
+class JobService:
+    def __init__(self, workers: int = MAX_CONCURRENT_PARSES):
+        self.workers = workers
+        self.pool = self._new_pool()
+        self.jobs = OrderedDict()   # job_id -> ParseJob, oldest first
+        self._by_key = {}           # (parser, sha256, PARSER_VERSION, backend order) -> job_id
+
+    async def submit(self, parser: str, data: bytes) -> tuple[ParseJob, bool]:
+        # Hashing a large catalog takes a while; keep the loop serving other clients
+        sha256 = (await asyncio.to_thread(hashlib.sha256, data)).hexdigest()
+        key = (parser, sha256, PARSER_VERSION, backend_order())
+        job = self.jobs.get(self._by_key.get(key))
+        if job is not None and job.status not in ("failed", "cancelled"):
+            return job, False
+        job = ParseJob(parser, sha256, self._submit(_parse, parser, data), key)
+        job.future.add_done_callback(lambda _: setattr(job, "finished", time.time()))
+        self.jobs[job.id] = job
+        self._by_key[key] = job.id
+        self._prune()
+        return job, True
+
+    def _submit(self, fn, *args):
+        try:
+            return self.pool.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (OOM, segfault in a PDF library); jobs already in the
+            # old pool fail, new ones get a fresh pool
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = self._new_pool()
+            return self.pool.submit(fn, *args)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawned like the parser workers: forking copies the event loop's
+        # threads and locks into the child
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _prune(self):
+        finished = [j for j in self.jobs.values() if j.future.done()]
+        for job in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self.jobs[job.id]
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+
+    def job(self, job_id: str) -> ParseJob:
+        if job_id not in self.jobs:
+            raise HttpError(404, f"Unknown job {job_id}")
+        return self.jobs[job_id]
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    # ---------- routes ----------
+
+    async def route(self, method: str, path: str, query: dict, body: bytes) -> tuple[int, str, bytes]:
+        parts = [p for p in path.split("/") if p]
+        if parts == ["jobs"] and method == "POST":
+            return await self._post_job(query, body)
+        if len(parts) == 2 and parts[0] == "jobs" and method == "GET":
+            return _json(200, self.job(parts[1]).to_json())
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result" and method == "GET":
+            return await self._get_result(self.job(parts[1]), query)
+        if parts == ["compare"] and method == "POST":
+            return await self._post_compare(body)
+        if parts in (["jobs"], ["compare"]) or (parts and parts[0] == "jobs"):
+            raise HttpError(405, f"{method} not allowed on {path}")
+        raise HttpError(404, f"No route for {path}")
+
+    async def _post_job(self, query: dict, body: bytes):
+        parser = query.get("parser", [""])[0]
+        if parser not in PARSERS:
+            raise HttpError(400, "Query parameter 'parser' must be 'gr' or 'ug'")
+        if not body.startswith(b"%PDF"):
+            raise HttpError(400, "Request body must be a PDF file")
+        job, created = await self.submit(parser, body)
+        return _json(202 if created else 200, job.to_json())
+
+    async def _get_result(self, job: ParseJob, query: dict):
+        fmt = query.get("format", ["json"])[0].lower()
+        df = job.frame()
+        if fmt == "json":
+            payload = await asyncio.to_thread(df.to_json, orient="records")
+            return 200, "application/json", payload.encode()
+        if fmt == "parquet":
+            if importlib.util.find_spec("pyarrow") is None:
+                raise HttpError(406, "Parquet output needs pyarrow; install it or use format=json")
+            buffer = io.BytesIO()
+            await asyncio.to_thread(df.to_parquet, buffer, index=False)
+            return 200, "application/vnd.apache.parquet", buffer.getvalue()
+        raise HttpError(400, "format must be 'json' or 'parquet'")
+
+    async def _post_compare(self, body: bytes):
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Request body must be JSON")
+        frames = []
+        for side in ("old", "new"):
+            value = request.get(side) if isinstance(request, dict) else None
+            if isinstance(value, str):
+                frames.append(self.job(value).frame().copy())
+            elif isinstance(value, list):
+                frames.append(pd.DataFrame(value))
+            else:
+                raise HttpError(400, f"'{side}' must be a list of rows or a job id")
+        try:
+            added, removed, changed = await asyncio.to_thread(compare_reports, *frames)
+        except MissingProgramColumn as exc:
+            raise HttpError(422, str(exc))
+        payload = "{%s}" % ",".join(
+            f'"{name}":{df.to_json(orient="records")}'
+            for name, df in (("added", added), ("removed", removed), ("changed", changed))
+        )
+        return 200, "application/json", payload.encode()
+
+# ---------------------------
+# HTTP plumbing
+# ---------------------------
+def _json(status: int, obj) -> tuple[int, str, bytes]:
+    return status, "application/json", json.dumps(obj).encode()
+
+async def _read_request(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Content-Length must be a number")
+    if length < 0:
+        raise HttpError(400, "Content-Length must not be negative")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, body
+
+async def _write_response(writer: asyncio.StreamWriter, status: int, content_type: str, payload: bytes):
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + payload)
+    await writer.drain()
+
+async def handle(service: JobService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        try:
+            request = await _read_request(reader)
+            if request is None:
+                return
+            method, target, body = request
+            url = urlsplit(target)
+            response = await service.route(method, url.path, parse_qs(url.query), body)
+        except HttpError as exc:
+            response = _json(exc.status, {"error": str(exc)})
+        except Exception as exc:
+            response = _json(500, {"error": repr(exc)})
+        await _write_response(writer, *response)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(host: str = "127.0.0.1", port: int = 8600, workers: int = MAX_CONCURRENT_PARSES):
+    service = JobService(workers)
+    server = await asyncio.start_server(lambda r, w: handle(service, r, w), host, port)
+    print(f"catalog job service on http://{host}:{port} ({workers} parse workers)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python service.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENT_PARSES)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
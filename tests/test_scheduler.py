@@ -0,0 +1,135 @@
+# tests/test_scheduler.py
+'''
+Shared-parse behaviour: coalescing, release, restarts on a key that is still
+stopping, checkpoint ownership and resuming after a crash.
+
+    python -m pytest -q
+'''
+import threading
+
+import pandas as pd
+import pytest
+
+from catalog_parser.checkpoint import Checkpoint
+from catalog_parser.merge import combine_catalogs
+from catalog_parser.scheduler import CANCELLED, DONE, ParseScheduler
+from utils.loadtest import synthetic_grad_catalog, synthetic_ug_catalog
+
+TIMEOUT = 10
+
+
+def _blocking(gate: threading.Event, started: threading.Event | None = None, honour_cancel: bool = True):
+    # Job function that runs until `gate` opens (or, if honoured, a cancel arrives)
+    def fn(job):
+        if started is not None:
+            started.set()
+        while not gate.wait(0.01):
+            if honour_cancel:
+                job.check_cancelled()
+        return job.key
+    return fn
+
+
+# ---------- scheduler ----------
+
+def test_same_key_returns_the_running_job():
+    scheduler, gate = ParseScheduler(limit=1), threading.Event()
+    first = scheduler.submit("k", _blocking(gate))
+    second = scheduler.submit("k", _blocking(gate))
+    assert second is first
+    assert first.waiters == 2
+    gate.set()
+    assert first.outcome() == "k"
+
+
+def test_release_cancels_only_when_last_holder_leaves():
+    scheduler, gate, started = ParseScheduler(limit=1), threading.Event(), threading.Event()
+    job = scheduler.submit("k", _blocking(gate, started))
+    scheduler.submit("k", _blocking(gate))
+    assert started.wait(TIMEOUT)
+
+    scheduler.release(job)
+    assert not job.cancel_requested()
+    scheduler.release(job)
+    assert job.wait(TIMEOUT)
+    assert job.state == CANCELLED
+
+
+def test_release_drops_a_queued_job():
+    scheduler, gate, started = ParseScheduler(limit=1), threading.Event(), threading.Event()
+    running = scheduler.submit("a", _blocking(gate, started))
+    assert started.wait(TIMEOUT)
+    queued = scheduler.submit("b", _blocking(gate))
+    assert scheduler.position(queued) == 1
+
+    scheduler.release(queued)
+    assert queued.done() and queued.state == CANCELLED
+    assert scheduler.position(queued) == 0
+    gate.set()
+    assert running.outcome() == "a"
+
+
+def test_resubmit_waits_for_the_job_still_stopping():
+    scheduler = ParseScheduler(limit=2)
+    gate, started = threading.Event(), threading.Event()
+    stopping = scheduler.submit("k", _blocking(gate, started, honour_cancel=False))
+    assert started.wait(TIMEOUT)
+    scheduler.release(stopping)   # asked to stop, but it has not yet
+
+    restarted = threading.Event()
+    again = scheduler.submit("k", _blocking(threading.Event(), restarted))
+    assert again is not stopping
+    assert again.after is stopping
+    assert not restarted.wait(0.3)   # a free slot, but the old job still holds the key
+
+    gate.set()
+    assert stopping.wait(TIMEOUT)
+    assert restarted.wait(TIMEOUT)
+    scheduler.release(again)
+    assert again.wait(TIMEOUT)
+    assert (stopping.state, again.state) == (DONE, CANCELLED)
+
+
+# ---------- checkpoints ----------
+
+def test_newer_checkpoint_claims_the_path(tmp_path):
+    path = tmp_path / "gr.json"
+    old = Checkpoint(path, every=1)
+    old.add({"Program Name": "A"})
+    old.advance("majors", 1)
+    assert path.exists()
+
+    new = Checkpoint(path, every=1)
+    assert new.resumed and new.records == [{"Program Name": "A"}]
+    assert old.superseded() and not new.superseded()
+
+    # The superseded run can neither overwrite nor delete the new run's progress
+    old.add({"Program Name": "B"})
+    old.advance("majors", 2)
+    old.clear()
+    assert Checkpoint(path).records == [{"Program Name": "A"}]
+
+
+# ---------- resume ----------
+
+class Crash(Exception):
+    pass
+
+
+def test_resume_after_crash_matches_uninterrupted_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # checkpoints go under the working directory
+    grad, ug = synthetic_grad_catalog(20, 5), synthetic_ug_catalog(20)
+    expected, _ = combine_catalogs(grad, ug, save_output=False)
+
+    found = []
+    def crash_midway(catalog, record):
+        found.append(record)
+        if len(found) == 12:
+            raise Crash()
+
+    with pytest.raises(Crash):
+        combine_catalogs(grad, ug, save_output=False, on_program=crash_midway, resume=True)
+    assert list((tmp_path / "upl_file_bunker" / "checkpoints").glob("gr-*.json"))
+
+    resumed, _ = combine_catalogs(grad, ug, save_output=False, resume=True)
+    pd.testing.assert_frame_equal(resumed, expected)
@@ -0,0 +1,91 @@
+# utils/comparison.py
+import re
+import pandas as pd
+
+class MissingProgramColumn(ValueError):
+    """A report has no 'Program Name' column to compare on."""
+
+def clean_program_names(df, col):
+    """
+    Clean program names by:
+    - Removing extra spaces around dashes
+    - Ensuring standard credentials have trailing periods
+    """
+    df[col] = df[col].astype(str).apply(lambda x: re.sub(r'\s*-\s*', '-', x.strip()))
+
+    # Add trailing periods to credentials if missing
+    credentials = [
+        "M.S", "M.A", "B.S", "B.A", "Ph.D", "Ed.D", "Ed.S", "M.F.A", "D.B.A", "D.N.P", 
+        "M.P.A", "M.B.A", "Au.D", "M.S.B", "M.S.C.S", "M.S.B.E", "M.S.C.P", "M.S.E.M"
+    ]
+
+    for cred in credentials:
+        df[col] = df[col].str.replace(rf'\b{cred}(?!\.)\b', f"{cred}.", regex=True)
+
+def find_program_column(columns):
+    for col in columns:
+        col_str = str(col).strip()
+        if "program" in col_str.lower() and "name" in col_str.lower():
+            return col
+    return None
+
+def compare_reports(df_old: pd.DataFrame, df_new: pd.DataFrame):
+    """
+    Compare two catalog reports and identify:
+      - Added programs (in new, not in old)
+      - Removed programs (in old, not in new)
+      - Changed programs (same program but different attributes)
+    """
+
+    # Detect key columns
+    col_old = find_program_column(df_old.columns)
+    col_new = find_program_column(df_new.columns)
+
+    # Clean names before comparing
+    if col_old:
+        clean_program_names(df_old, col_old)
+    if col_new:
+        clean_program_names(df_new, col_new)
+
+    # ✅ Debug info: show what columns were found
+    # st.write("Detected columns in report 1:", list(df_old.columns))
+    # st.write("Detected columns in report 2:", list(df_new.columns))
+    # st.write("Auto-detected key columns:", col_old, col_new)
+
+    # ✅ Handle case where the column isn't found
+    if not col_old or not col_new:
+        raise MissingProgramColumn(
+            "Could not find a 'Program Name' column in one of the reports!\n\n"
+            f"Old report columns: {list(df_old.columns)}\n"
+            f"New report columns: {list(df_new.columns)}"
+        )
+
+    # ✅ Now safely use the detected columns
+    old_names = set(df_old[col_old])
+    new_names = set(df_new[col_new])
+
+    # --- Find Added ---
+    added = df_new[df_new[col_new].isin(new_names - old_names)]
+
+    # --- Find Removed ---
+    removed = df_old[df_old[col_old].isin(old_names - new_names)]
+
+    # --- Find Changed ---
+    common = old_names.intersection(new_names)
+    df_common_old = df_old[df_old[col_old].isin(common)].set_index(col_old)
+    df_common_new = df_new[df_new[col_new].isin(common)].set_index(col_new)
+
+    changed_rows = []
+    for program in common:
+        old_row = df_common_old.loc[program]
+        new_row = df_common_new.loc[program]
+
+        if not old_row.equals(new_row):
+            diff = pd.concat([old_row, new_row], axis=1)
+            diff.columns = ["Old", "New"]
+            diff.insert(0, "Program Name", program)
+            changed_rows.append(diff.reset_index())
+
+    changed = pd.concat(changed_rows, ignore_index=True) if changed_rows else pd.DataFrame()
+
+    return added, removed, changed
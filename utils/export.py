@@ -0,0 +1,86 @@
+# utils/export.py
+import io
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CHUNK_ROWS = 500
+
+# Label shown in the UI -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "JSONL": ("jsonl", "application/x-ndjson"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+# ---------------------------
+# Row streams (one chunk of rows at a time, nothing staged on disk)
+# ---------------------------
+def iter_csv(df: "pd.DataFrame", chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    yield df.iloc[:0].to_csv(index=False).encode("utf-8")  # header row
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=False).encode("utf-8")
+
+def iter_jsonl(df: "pd.DataFrame", chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        # lines=True already terminates every record (including the last) with a newline
+        yield chunk.to_json(orient="records", lines=True, force_ascii=False, date_format="iso").encode("utf-8")
+
+def iter_xlsx(sheets: dict[str, "pd.DataFrame"]) -> Iterator[bytes]:
+    """
+    XLSX is a zip archive, so it can only be emitted once complete; rows are
+    still appended one by one through openpyxl's write-only mode.
+    """
+    import pandas as pd
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for title, df in sheets.items():
+        ws = wb.create_sheet(title=title[:31])
+        ws.append([str(c) for c in df.columns])
+        for row in df.itertuples(index=False, name=None):
+            ws.append([None if pd.isna(v) else v for v in row])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    yield buffer.getvalue()
+
+def iter_export(df: "pd.DataFrame", fmt: str, sheet_name: str = "Sheet1") -> Iterator[bytes]:
+    if fmt == "CSV":
+        return iter_csv(df)
+    if fmt == "JSONL":
+        return iter_jsonl(df)
+    if fmt == "XLSX":
+        return iter_xlsx({sheet_name: df})
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+# ---------------------------
+# Download payloads
+# ---------------------------
+def export_buffer(df: "pd.DataFrame", fmt: str, sheet_name: str = "Sheet1") -> io.BytesIO:
+    """
+    Collect the row stream into an in-memory buffer for `st.download_button`.
+    """
+    buffer = io.BytesIO()
+    for chunk in iter_export(df, fmt, sheet_name=sheet_name):
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+def cached_export(cache: dict, df: "pd.DataFrame", fmt: str, sheet_name: str = "Sheet1") -> bytes:
+    """
+    `export_buffer`'s bytes, built once per (sheet, format) and kept in `cache`
+    (a dict in `st.session_state`; the caller empties it when the frame changes),
+    so reruns that only redraw the download button don't rebuild the file.
+    """
+    key = (sheet_name, fmt)
+    if key not in cache:
+        cache[key] = export_buffer(df, fmt, sheet_name=sheet_name).getvalue()
+    return cache[key]
+
+def export_filename(stem: str, fmt: str) -> str:
+    return f"{stem}.{EXPORT_FORMATS[fmt][0]}"
+
+def export_mime(fmt: str) -> str:
+    return EXPORT_FORMATS[fmt][1]
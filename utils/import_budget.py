@@ -0,0 +1,61 @@
+# utils/import_budget.py
+'''
+Import-time budget check for the Streamlit pages.
+
+    python -m utils.import_budget
+
+Each page module is imported in a fresh interpreter, after Streamlit itself
+(which every page needs), and fails the check if it takes longer than its
+budget or pulls in a heavy dependency that should only load on first use.
+'''
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "PyPDF2", "pdfplumber", "pdfminer", "openpyxl")
+
+# module -> (seconds on top of `import streamlit`, modules that must not be loaded yet)
+BUDGETS = {
+    "page_handler.home": (0.10, HEAVY_MODULES),
+    "page_handler.cat_report": (0.10, HEAVY_MODULES),
+    "page_handler.comp_report": (1.50, ("PyPDF2", "pdfplumber", "pdfminer")),
+}
+
+RUNS = 3  # best of N, to ride out a cold disk cache
+
+_PROBE = """
+import json, sys, time
+import streamlit
+start = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(module: str) -> tuple[float, list[str]]:
+    best, loaded = None, []
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        if best is None or result["elapsed"] < best:
+            best = result["elapsed"]
+        loaded = result["loaded"]
+    return best, loaded
+
+def check() -> bool:
+    ok = True
+    for module, (budget, forbidden) in BUDGETS.items():
+        elapsed, loaded = measure(module)
+        eager = [m for m in loaded if m in forbidden]
+        passed = elapsed <= budget and not eager
+        ok &= passed
+        status = "ok  " if passed else "FAIL"
+        detail = f" eagerly imports {', '.join(eager)}" if eager else ""
+        print(f"{status} {module:<28} {elapsed * 1000:7.1f} ms (budget {budget * 1000:.0f} ms){detail}")
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
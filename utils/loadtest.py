@@ -0,0 +1,362 @@
+# utils/loadtest.py
+'''
+Multi-session load test for the report pipeline.
+
+    python -m utils.loadtest --sessions 8 --rate 2 --requests 40
+
+Simulates `--sessions` concurrent app sessions in one process (as Streamlit runs
+them: one script thread each). Requests arrive as a Poisson stream at `--rate`
+per second; each is either a catalog report (`combine_catalogs` on synthetic
+graduate / undergraduate PDFs) or a comparison (`compare_reports` on two
+synthetic report frames). Latency is measured from arrival, so time spent
+waiting for a free session counts. Reports p50 / p95 / p99 latency, throughput
+and peak memory of this process and of the parser worker processes.
+
+Parser imports, and with `--via-scheduler` the worker pool start-up, happen
+before the timed phase, so latencies are steady-state numbers.
+'''
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ---------------------------
+# Synthetic inputs
+# ---------------------------
+SUBJECTS = [
+    "Accounting", "Biology", "Chemistry", "Education", "Nursing", "History", "Physics", "Economics",
+    "Geology", "Music", "Philosophy", "Statistics", "Sociology", "Linguistics", "Finance", "Marketing",
+    "Anthropology", "Psychology", "Engineering", "Mathematics", "Journalism", "Criminology",
+]
+QUALIFIERS = ["", "Applied ", "Marine ", "Computational ", "Clinical ", "Environmental ", "Public ", "Global "]
+GRAD_DEGREES = ["M.S.", "M.A.", "Ph.D.", "M.Ed.", "D.N.P.", "M.Acc."]
+UG_KINDS = ["B.S.", "B.A.", "MINOR", "CERTIFICATE"]
+MODALITY_LINES = ["This program is offered fully online.", "Hybrid delivery is available.", "Courses meet on campus."]
+
+GR_OFFSET = 51        # front-matter pages the graduate parser skips
+GR_CERT_START = 763   # first printed page of the graduate certificate section
+UG_FIRST_PAGE = 146   # first printed page the undergraduate parser reads
+
+def _escape(text: str) -> bytes:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1")
+
+def _to_unicode(codes: dict[int, str]) -> bytes:
+    """ToUnicode CMap stream body for single-byte `codes`."""
+    entries = b"".join(b"<%02X> <%s>\n" % (code, text.encode("utf-16-be").hex().upper().encode()) for code, text in codes.items())
+    return (
+        b"/CIDInit /ProcSet findresource begin 12 dict begin begincmap /CMapName /Synthetic def "
+        b"1 begincodespacerange <00> <FF> endcodespacerange\n%d beginbfchar\n%sendbfchar\n"
+        b"endcmap CMapName currentdict /CMap defineresource pop end end" % (len(codes), entries)
+    )
+
+def _ligature_text(text: str) -> bytes:
+    # "fi" drawn as one glyph (code 0x1F), as typesetting tools do
+    return b"\\037".join(_escape(part) for part in text.split("fi"))
+
+def _subset_text(text: str) -> bytes:
+    # Subset fonts number their glyphs from the first one used, not by character code
+    return b"".join(b"\\%03o" % (ord(ch) - 29) for ch in text)
+
+# Font flavours of the synthetic PDFs: font dict, ToUnicode map (or None), string encoder
+FONT_STYLES = {
+    "plain": (b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>", None, _escape),
+    "ligature": (
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding /ToUnicode 4 0 R >>",
+        {**{c: chr(c) for c in range(0x20, 0x7F)}, 0x1F: "fi"},
+        _ligature_text,
+    ),
+    "subset": (
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /ABCDEF+Helvetica /Encoding /WinAnsiEncoding /ToUnicode 4 0 R >>",
+        {c - 29: chr(c) for c in range(0x20, 0x7F)},
+        _subset_text,
+    ),
+}
+
+def _pdf(pages: list[tuple[list[str], int | None]], style: str = "plain", compress: bool = False) -> bytes:
+    """
+    Minimal text-only PDF (Helvetica, one content stream per page), so the
+    harness needs nothing beyond the parser's own dependencies. `style` picks a
+    FONT_STYLES flavour; `compress` Flate-encodes the content streams.
+    """
+    font, to_unicode, encode = FONT_STYLES[style]
+    objects = [b"", b"", font]
+    if to_unicode is not None:
+        cmap = _to_unicode(to_unicode)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(cmap), cmap))
+    kids = []
+    for lines, footer in pages:
+        stream = b"BT /F1 10 Tf 14 TL 50 740 Td " + b" T* ".join(b"(" + encode(l) + b") Tj" for l in lines) + b" ET"
+        if footer is not None:
+            stream += b" BT /F1 9 Tf 300 30 Td (%s) Tj ET" % encode(str(footer))
+        if compress:
+            stream = zlib.compress(stream)
+            objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        else:
+            objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def _names(rng: random.Random, count: int) -> list[str]:
+    pool = [f"{q}{s}" for s in SUBJECTS for q in QUALIFIERS]
+    return rng.sample(pool, min(count, len(pool)))
+
+def synthetic_grad_catalog(
+    programs: int = 20, certificates: int = 5, seed: int = 0, style: str = "plain", compress: bool = False
+) -> bytes:
+    """Graduate catalog laid out the way gr_parser expects: front matter, majors, certificates."""
+    rng = random.Random(seed)
+    pages = [(["Front matter page", "usf is a place"], None)] * GR_OFFSET
+    printed = GR_OFFSET + 1
+    for name in _names(rng, programs):
+        pages.append(([
+            f"{name}, {rng.choice(GRAD_DEGREES)}", "College of Arts and Sciences",
+            f"Total Minimum Hours: {rng.choice([30, 32, 36, 42, 60])}", rng.choice(MODALITY_LINES),
+            "Concentrations:", "- alpha", "- beta", "licensure may apply",
+        ], printed))
+        pages.append((["course description text " * 3, "ABC 6000 some course"], printed + 1))
+        pages.append((["requirements table", "30 credit hours"], printed + 2))
+        printed += 3
+    printed = GR_CERT_START
+    for name in _names(rng, certificates):
+        pages.append(([
+            f"{name.lower()} graduate certificate", "Graduate Certificate",
+            f"Total minimum hours: {rng.choice([12, 15, 18])}", rng.choice(MODALITY_LINES),
+        ], printed))
+        pages.append((["courses"], printed + 1))
+        printed += 2
+    return _pdf(pages, style, compress)
+
+def synthetic_ug_catalog(programs: int = 20, seed: int = 0, style: str = "plain", compress: bool = False) -> bytes:
+    """Undergraduate catalog laid out the way ug_parser expects."""
+    rng = random.Random(seed)
+    header = "UNIVERSITY OF SOUTH FLORIDA 2024-2025 UNDERGRADUATE CATALOG"
+    pages = [(["intro"], n + 1) for n in range(5)]
+    printed = UG_FIRST_PAGE
+    for name in _names(rng, programs):
+        pages.append(([
+            header, f"{name.upper()} {rng.choice(UG_KINDS)}", f"TOTAL DEGREE HOURS: {rng.choice([120, 124, 128])}",
+            rng.choice(MODALITY_LINES), "state-approved program", "Total Minor Hours: 18",
+            "Certificate Core (12 Credit Hours)",
+        ], printed))
+        pages.append(([header, "course descriptions here", "lowercase stuff"], printed + 1))
+        printed += 2
+    return _pdf(pages, style, compress)
+
+def synthetic_reports(rows: int = 500, churn: float = 0.05, seed: int = 0):
+    """An (old, new) pair of report frames; `churn` of the rows are added, removed or changed."""
+    import pandas as pd
+
+    rng = random.Random(seed)
+    def row(n):
+        return {
+            "Program Name": f"Program {n}, {rng.choice(GRAD_DEGREES)}",
+            "Accredited": rng.choice(["Yes", "No"]),
+            "Total Credit Hours in Program": rng.choice([30, 36, 60, 120]),
+            "Modality": rng.choice(["Online", "Hybrid", "Campus"]),
+            "Page Number": rng.randint(52, 761),
+        }
+    old = [row(n) for n in range(rows)]
+    new = [dict(r) for r in old]
+    for r in rng.sample(new, int(rows * churn)):
+        r["Total Credit Hours in Program"] += 3
+    removed = set(rng.sample(range(rows), int(rows * churn)))
+    new = [r for n, r in enumerate(new) if n not in removed]
+    new += [row(rows + n) for n in range(int(rows * churn))]
+    return pd.DataFrame(old), pd.DataFrame(new)
+
+# ---------------------------
+# Scenarios
+# ---------------------------
+class Workload:
+    """Pre-built inputs shared by every simulated session."""
+
+    def __init__(self, programs: int, report_rows: int, variants: int, via_scheduler: bool):
+        # `variants` distinct catalog pairs: 1 means every session uploads the same files
+        self.catalogs = [
+            (synthetic_grad_catalog(programs, max(1, programs // 4), seed=v), synthetic_ug_catalog(programs, seed=v))
+            for v in range(variants)
+        ]
+        self.reports = synthetic_reports(report_rows)
+        self.via_scheduler = via_scheduler
+
+    def catalog(self, rng: random.Random):
+        from catalog_parser.merge import combine_catalogs, submit_catalogs
+
+        grad, ug = rng.choice(self.catalogs)
+        if self.via_scheduler:
+            return submit_catalogs(grad, ug).outcome()
+        return combine_catalogs(grad, ug, save_output=False)[0]
+
+    def warm(self):
+        """Import the parsers and start the worker pool (if one is used) so the timed phase doesn't pay for it."""
+        import catalog_parser.merge  # noqa: F401  (pulls in both parsers)
+        import utils.comparison  # noqa: F401
+        from catalog_parser.workers import get_pool
+
+        pool = get_pool() if self.via_scheduler else None
+        if pool is not None and not pool.wait_ready():
+            raise RuntimeError("Worker pool did not finish starting")
+
+    def compare(self, rng: random.Random):
+        from utils.comparison import compare_reports
+
+        old, new = self.reports
+        return compare_reports(old.copy(), new.copy())
+
+# ---------------------------
+# Driver
+# ---------------------------
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # kB on Linux
+
+def _worker_rss_mb() -> list[float]:
+    # Peak RSS each live parser worker last reported; empty without a pool
+    from catalog_parser.workers import WORKER_PROCESSES, get_pool
+
+    if WORKER_PROCESSES <= 0:
+        return []
+    pool = get_pool()
+    pool.check()  # idle workers answer the ping with their current peak
+    return [round(mb, 1) for mb in pool.stats()["rss_mb"] if mb is not None]
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))  # nearest rank
+    return ordered[index]
+
+def run_load(
+    workload: Workload,
+    sessions: int = 4,
+    rate: float = 1.0,
+    requests: int = 20,
+    compare_share: float = 0.3,
+    seed: int = 0,
+) -> dict:
+    """
+    Fire `requests` arrivals (Poisson, `rate` per second) at `sessions` concurrent
+    sessions and collect per-request latency. Returns the summary dict.
+    """
+    rng = random.Random(seed)
+    results = []   # (scenario, latency seconds, error or None)
+    lock = threading.Lock()
+
+    def session_request(scenario: str, arrived: float, request_seed: int):
+        error = None
+        try:
+            getattr(workload, scenario)(random.Random(request_seed))
+        except Exception as exc:
+            error = repr(exc)
+        with lock:
+            results.append((scenario, time.perf_counter() - arrived, error))
+
+    workload.warm()
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as pool:
+        next_arrival = start
+        for n in range(requests):
+            next_arrival += rng.expovariate(rate)
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            scenario = "compare" if rng.random() < compare_share else "catalog"
+            pool.submit(session_request, scenario, next_arrival, seed * 100003 + n)
+    elapsed = time.perf_counter() - start
+
+    def summary(rows):
+        latencies = [lat for _, lat, err in rows if err is None]
+        if not latencies:
+            return {"count": len(rows), "errors": len(rows)}
+        return {
+            "count": len(rows),
+            "errors": sum(err is not None for _, _, err in rows),
+            "p50_s": round(percentile(latencies, 50), 3),
+            "p95_s": round(percentile(latencies, 95), 3),
+            "p99_s": round(percentile(latencies, 99), 3),
+            "mean_s": round(statistics.fmean(latencies), 3),
+        }
+
+    report = {
+        "sessions": sessions,
+        "rate_per_s": rate,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(len(results) / elapsed, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "rss_before_mb": rss_before,
+        "worker_rss_mb": _worker_rss_mb() if workload.via_scheduler else [],
+        "all": summary(results),
+    }
+    for scenario in ("catalog", "compare"):
+        rows = [r for r in results if r[0] == scenario]
+        if rows:
+            report[scenario] = summary(rows)
+    errors = sorted({err for _, _, err in results if err})
+    if errors:
+        report["error_samples"] = errors[:5]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m utils.loadtest")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent app sessions")
+    parser.add_argument("--rate", type=float, default=1.0, help="mean arrivals per second")
+    parser.add_argument("--requests", type=int, default=20, help="total requests to send")
+    parser.add_argument("--compare-share", type=float, default=0.3, help="fraction of requests that are comparisons")
+    parser.add_argument("--programs", type=int, default=20, help="programs per synthetic catalog")
+    parser.add_argument("--report-rows", type=int, default=500, help="rows per synthetic comparison report")
+    parser.add_argument("--variants", type=int, default=3, help="distinct catalog pairs sessions choose from")
+    parser.add_argument("--via-scheduler", action="store_true", help="route catalog reports through the shared scheduler")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    workload = Workload(args.programs, args.report_rows, args.variants, args.via_scheduler)
+    report = run_load(workload, args.sessions, args.rate, args.requests, args.compare_share, args.seed)
+
+    print(f"{args.requests} requests, {args.sessions} sessions, {args.rate}/s arrivals, {report['elapsed_s']} s")
+    print(f"{'scenario':<10} {'count':>6} {'errors':>7} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}")
+    for scenario in ("catalog", "compare", "all"):
+        s = report.get(scenario)
+        if s:
+            print(f"{scenario:<10} {s['count']:>6} {s['errors']:>7} {s.get('p50_s', '-'):>8} {s.get('p95_s', '-'):>8} {s.get('p99_s', '-'):>8}")
+    print(f"throughput {report['throughput_per_s']} req/s · peak RSS {report['peak_rss_mb']} MB (before load {report['rss_before_mb']} MB)")
+    workers = report["worker_rss_mb"]
+    if workers and report["peak_rss_mb"] is not None:
+        total = round(report["peak_rss_mb"] + sum(workers), 1)
+        print(f"worker peak RSS {' + '.join(map(str, workers))} MB · total {total} MB across {len(workers) + 1} processes")
+    for err in report.get("error_samples", []):
+        print("error:", err)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
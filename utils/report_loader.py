@@ -0,0 +1,141 @@
+# utils/report_loader.py
+'''
+Fast loader for large report workbooks.
+
+Workbooks are opened with openpyxl in read-only (streaming) mode and only the
+target sheet is read. The header row is found by sampling the first rows for a
+"Program Name" column, and parsed sheets are cached by file hash so changing a
+UI option never re-reads a workbook.
+'''
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from utils.comparison import find_program_column
+
+DEFAULT_SHEET = "PROGRAM SHEET"
+HEADER_SCAN_ROWS = 30   # rows sampled when looking for the header
+CACHE_SIZE = 8          # parsed sheets kept in memory
+
+_cache = OrderedDict()  # (sha256, requested sheet) -> (resolved sheet, row tuples)
+_cache_lock = threading.Lock()
+
+# ---------------------------
+# Workbook access
+# ---------------------------
+def file_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _open(data: bytes):
+    return load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+
+def sheet_names(data: bytes) -> list[str]:
+    """Sheet names only; no worksheet XML is parsed for this."""
+    wb = _open(data)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def detect_header_row(rows: list[tuple]) -> int | None:
+    """0-based index of the first sampled row holding a Program Name column."""
+    for idx, row in enumerate(rows[:HEADER_SCAN_ROWS]):
+        if find_program_column([c for c in row if c is not None]) is not None:
+            return idx
+    return None
+
+def _pick_sheet(wb, sheet_name: str | None) -> str:
+    if sheet_name:
+        if sheet_name not in wb.sheetnames:
+            raise KeyError(f"Worksheet '{sheet_name}' not found; available: {wb.sheetnames}")
+        return sheet_name
+    if DEFAULT_SHEET in wb.sheetnames:
+        return DEFAULT_SHEET
+    # Otherwise the first sheet whose opening rows contain a Program Name header
+    for name in wb.sheetnames:
+        sample = list(wb[name].iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True))
+        if detect_header_row(sample) is not None:
+            return name
+    return wb.sheetnames[0]
+
+def _sheet_rows(data: bytes, digest: str, sheet_name: str | None) -> tuple[str, list[tuple]]:
+    """All rows of one sheet as value tuples, cached by (file hash, sheet)."""
+    key = (digest, sheet_name)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    wb = _open(data)
+    try:
+        name = _pick_sheet(wb, sheet_name)
+        rows = list(wb[name].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+    with _cache_lock:
+        # Cache under the resolved name too, so auto-detect and an explicit pick share one read
+        _cache[key] = _cache[(digest, name)] = (name, rows)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return name, rows
+
+# ---------------------------
+# DataFrame construction
+# ---------------------------
+def _column_names(header: tuple) -> list[str]:
+    # Same naming pd.read_excel uses for blank and repeated headers
+    names, counts = [], {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in counts:
+            counts[name] += 1
+            name = f"{name}.{counts[name]}"
+        else:
+            counts[name] = 0
+        names.append(name)
+    return names
+
+def _frame(rows: list[tuple], header_idx: int) -> pd.DataFrame:
+    body = rows[header_idx + 1:]
+    # Trailing all-blank rows are formatting residue; pd.read_excel drops them too
+    end = len(body)
+    while end and all(v is None for v in body[end - 1]):
+        end -= 1
+    header = rows[header_idx] if header_idx < len(rows) else ()
+    width = max([len(header)] + [len(r) for r in body[:end]])
+    header = tuple(header) + (None,) * (width - len(header))
+    df = pd.DataFrame([tuple(r) + (None,) * (width - len(r)) for r in body[:end]], columns=_column_names(header))
+    return df.infer_objects()
+
+def load_report(data: bytes, sheet_name: str | None = None, header_row: int | None = None) -> tuple[pd.DataFrame, dict]:
+    """
+    Load one report sheet.
+
+    `sheet_name=None` picks DEFAULT_SHEET or the first sheet with a Program Name
+    header; `header_row=None` auto-detects the (1-based) header row. Returns the
+    frame (a fresh copy, safe to modify) and the sheet / header row actually used.
+    """
+    name, rows = _sheet_rows(data, file_digest(data), sheet_name)
+    if header_row is None:
+        header_idx = detect_header_row(rows)
+        if header_idx is None:
+            raise ValueError(
+                f"No 'Program Name' column in the first {HEADER_SCAN_ROWS} rows of sheet '{name}'"
+            )
+    else:
+        header_idx = header_row - 1
+    return _frame(rows, header_idx), {"sheet": name, "header_row": header_idx + 1}
+
+def load_reports(files: list[bytes], sheet_name: str | None = None, header_row: int | None = None) -> list[tuple[pd.DataFrame, dict]]:
+    """
+    Load several reports at once, one thread per workbook (XML parsing in the
+    expat layer releases the GIL, and cached sheets return immediately).
+    """
+    with ThreadPoolExecutor(max_workers=len(files) or 1) as pool:
+        return list(pool.map(lambda data: load_report(data, sheet_name, header_row), files))